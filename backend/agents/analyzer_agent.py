@@ -1,30 +1,35 @@
 from backend.agents.base_agent import BaseAgent
-import yaml
+from backend.service.llm_scheduler import LLMUnavailableError
 from datetime import datetime
 import os
 from backend.schema.schemas import AnalzyerOutput
-from typing import List, Dict, Any
+from backend.util.prompt_registry import prompt_registry
+from backend.util.dependencies import getRuleBook
+from backend.service.retrieval_service import RulebookIndex, estimate_tokens
+from backend.service.context_renderer import ContextRenderer
+from backend.util.metrics import metrics
+from typing import List, Dict, Any, AsyncIterator
+from collections import OrderedDict
+import json
+import re
 
 
 class AnalyzerAgent(BaseAgent):
     def __init__(self):
         super().__init__()
-        self.legalbook = None
+        self.rulebook = getRuleBook()
         self.qa_template = None
+        self.indexes = OrderedDict()
+        self.renderer = ContextRenderer(
+            evidence=self.config.PROMPT_EVIDENCE,
+            evidence_chars=self.config.PROMPT_EVIDENCE_CHARS,
+        )
 
         try:
-            legalbook_path = os.path.join(
-                os.path.dirname(__file__), "rules", "legalbook.yaml"
-            )
-            with open(legalbook_path, "r", encoding="utf-8") as file:
-                self.legalbook = yaml.safe_load(file)
-
-            prompts_path = os.path.join(
+            format_path = os.path.join(
                 os.path.dirname(__file__), "rules", "format.yaml"
             )
-            with open(prompts_path, "r", encoding="utf-8") as file:
-                format = yaml.safe_load(file)
-                self.qa_template = format["qa_user_template"]
+            self.qa_template = prompt_registry.load(format_path)["qa_user_template"]
 
         except Exception as e:
             raise ValueError(f"Failed to initialize AnalyzerAgent: {str(e)}")
@@ -36,23 +41,52 @@ class AnalyzerAgent(BaseAgent):
         result.append(jurisdiction["states"])
         return result
 
-    def extract_legal(self, region: List[str]) -> Dict[str, Any]:
-        result = {}
+    def extract_legal(self, region: List[str], question: str = None) -> Dict[str, Any]:
+        """Rulebook context for the regions, ranked against the question when given"""
+        books = self.rulebook.load_regions(region)
+        top_k = self.config.RULEBOOK_TOP_K
+        if question and top_k > 0:
+            return self.get_index(books).search(
+                question, list(books), top_k, self.config.RULEBOOK_TOKEN_BUDGET
+            )
 
-        for i in region:
-            if i in self.legalbook["geo"]:
-                result.update(self.legalbook["geo"][i])
-            else:
-                continue
+        result = {}
+        for book in books.values():
+            result.update(book)
         return result
 
+    def get_index(self, books: Dict[str, Any]) -> RulebookIndex:
+        """BM25 index over just these shards, the last few are kept"""
+        # the cached value holds the books, so their ids stay unique while cached
+        key = tuple((region, id(book)) for region, book in books.items())
+        entry = self.indexes.get(key)
+        if entry is None:
+            entry = self.indexes[key] = (books, RulebookIndex(books))
+            while len(self.indexes) > 32:
+                self.indexes.popitem(last=False)
+        else:
+            self.indexes.move_to_end(key)
+        return entry[1]
+
     def _wrap_question(self, question: str, jurisdiction: str = None) -> str:
         """Simply combine the question with jurisdiction if provided"""
-        region_lists = self.extract_region(jurisdiction)
-        legal_json = self.extract_legal(region_lists)
-        print(legal_json)
-
         if jurisdiction:
+            region_lists = self.extract_region(jurisdiction)
+            legal_json = self.extract_legal(region_lists, question)
+            # the reduction against the whole rulebook is reported by
+            # scripts/bench_prompt_size, not measured on every call
+            if self.config.PROMPT_CONTEXT_FORMAT == "compact":
+                legal_json, stats = self.renderer.render(legal_json)
+                metrics.rulebook_context_tokens.observe(
+                    stats["tokens_after"], format="compact"
+                )
+                metrics.rulebook_context_saved_tokens.inc(
+                    stats["tokens_before"] - stats["tokens_after"]
+                )
+            else:
+                metrics.rulebook_context_tokens.observe(
+                    estimate_tokens(str(legal_json)), format="dict"
+                )
             return f"Referencing the legal compliance: {legal_json}\n for jurisdiction {jurisdiction} check for violation: {question}."
 
         return question
@@ -65,11 +99,13 @@ class AnalyzerAgent(BaseAgent):
             system_prompt = self.get_system_prompt("analyzer_agent")
 
             formatted_question = self._wrap_question(user_input, jurisdiction)
-            response: AnalzyerOutput = self.run(
+            response: AnalzyerOutput = await self.arun(
                 system_prompt, formatted_question, AnalzyerOutput
             )
             return response
 
+        except LLMUnavailableError:
+            raise
         except Exception as e:
             print(f"Error in analyze_question: {str(e)}")
             return {
@@ -77,3 +113,22 @@ class AnalyzerAgent(BaseAgent):
                 "error": str(e),
                 "timestamp": datetime.now().isoformat(),
             }
+
+    async def astream_question(
+        self, user_input: str, jurisdiction: dict
+    ) -> AsyncIterator[str]:
+        """Stream the raw JSON answer, parse it with parse_output once complete"""
+        system_prompt = self.get_system_prompt("analyzer_agent")
+        formatted_question = self._wrap_question(user_input, jurisdiction)
+        async for chunk in self.astream(system_prompt, formatted_question):
+            yield chunk
+
+    def parse_output(self, text: str) -> AnalzyerOutput:
+        match = re.search(r"\{[\s\S]*\}", text)
+        if not match:
+            raise ValueError("No JSON object in analyzer response")
+        data = json.loads(match.group(0))
+        data.setdefault("evidence", "N/A")
+        return AnalzyerOutput.model_validate(
+            {k: v if isinstance(v, str) else json.dumps(v) for k, v in data.items()}
+        )
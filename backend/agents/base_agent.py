@@ -1,58 +1,257 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
-
-# from backend.util.config import getConfig
-import sys
-import os
-
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "util")))
-from config import getConfig
-from typing import Type, TypeVar
-import yaml
+from backend.util.config import getConfig
+from backend.repository.llm_cache_repo import LLMCacheRepository
+from backend.util.prompt_registry import prompt_registry
+from backend.util.metrics import metrics
+from backend.service.llm_scheduler import LLMScheduler, LLMUnavailableError
+from typing import AsyncIterator, Type, TypeVar
 from pydantic import BaseModel
+import os
+import threading
+import time
 
 T = TypeVar("T", bound=BaseModel)
 
 
 class BaseAgent:
-    config = getConfig()
-    API_KEY = config.get_gemini_api()
+    """Shared plumbing of all agents.
+
+    The chat client (and its connection pool), the prompt template and the
+    per-schema chains are created on first use and shared by every agent.
+    """
+
+    MODEL = "gemini-2.0-flash"
+    PROMPTS_PATH = os.path.join(os.path.dirname(__file__), "prompts", "prompts.yaml")
+    prompt = ChatPromptTemplate.from_messages(
+        [("system", "{system_prompt}"), ("human", "{input}")]
+    )
+    cache = None
+    _client = None
+    _scheduler = None
+    _chains = {}
+    _lock = threading.Lock()
 
     def __init__(self):
-        self.client = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            google_api_key=self.API_KEY,
-        )
+        if self.config.LLM_CACHE_ENABLED and BaseAgent.cache is None:
+            BaseAgent.cache = LLMCacheRepository(
+                self.config.LLM_CACHE_PATH,
+                ttl=self.config.LLM_CACHE_TTL,
+                max_entries=self.config.LLM_CACHE_MAX_ENTRIES,
+                max_bytes=self.config.LLM_CACHE_MAX_BYTES,
+            )
 
-        self.prompt = ChatPromptTemplate.from_messages(
-            [("system", "{system_prompt}"), ("human", "{input}")]
-        )
+    @property
+    def config(self):
+        return getConfig()
+
+    @property
+    def client(self) -> ChatGoogleGenerativeAI:
+        if BaseAgent._client is None:
+            with BaseAgent._lock:
+                if BaseAgent._client is None:
+                    # retries are done by the scheduler
+                    BaseAgent._client = ChatGoogleGenerativeAI(
+                        model=self.MODEL,
+                        google_api_key=self.config.get_gemini_api(),
+                        max_retries=0,
+                    )
+        return BaseAgent._client
+
+    @property
+    def scheduler(self) -> LLMScheduler:
+        """Rate limit, retries and coalescing shared by every agent"""
+        if BaseAgent._scheduler is None:
+            with BaseAgent._lock:
+                if BaseAgent._scheduler is None:
+                    BaseAgent._scheduler = LLMScheduler(
+                        rate_per_minute=self.config.LLM_RATE_PER_MINUTE,
+                        burst=self.config.LLM_BURST,
+                        max_retries=self.config.LLM_MAX_RETRIES,
+                        backoff_base=self.config.LLM_BACKOFF_BASE,
+                        backoff_max=self.config.LLM_BACKOFF_MAX,
+                    )
+        return BaseAgent._scheduler
 
     def get_system_prompt(self, agent_type: str) -> str:
         try:
-            with open("agents/prompts/prompts.yaml", "r") as f:
-                data = yaml.safe_load(f)
-                system_prompt = data["prompts"].get(agent_type, data["prompts"]["base"])
-            return system_prompt
+            return prompt_registry.get_prompt(self.PROMPTS_PATH, agent_type, "base")
         except Exception as e:
             print(f"Error getting system prompt for {agent_type}: {e} ")
 
-    def run(self, system_prompt: str, input: str, schema: Type[T] = None) -> T:
-        """Run the agent with human input."""
-        try:
+    def _build_chain(self, schema: Type[T] = None):
+        """Chain for the schema (None for plain text), built once and reused"""
+        chain = BaseAgent._chains.get(schema)
+        if chain is None:
             if schema is not None:
-                structured_client = self.client.with_structured_output(schema)
-                chain = self.prompt | structured_client
-                response = chain.invoke(
-                    {"system_prompt": system_prompt, "input": input}
+                chain = self.prompt | self.client.with_structured_output(
+                    schema, include_raw=True
                 )
-                return response
             else:
                 chain = self.prompt | self.client
-                response = chain.invoke(
-                    {"system_prompt": system_prompt, "input": input}
+            BaseAgent._chains[schema] = chain
+        return chain
+
+    def _cache_key(self, system_prompt, input, schema, use_cache):
+        """Cache key, None when caching is off or bypassed for this call"""
+        if self.cache is None:
+            return None
+        key = self.cache.make_key(self.MODEL, system_prompt, input, schema)
+        if not use_cache:
+            self.cache.record_bypass()
+            metrics.llm_cache.inc(agent=type(self).__name__, result="bypass")
+        return key
+
+    def _count_lookup(self, cached):
+        result = "miss" if cached is None else "hit"
+        metrics.llm_cache.inc(agent=type(self).__name__, result=result)
+
+    def _cache_lookup(self, system_prompt, input, schema, use_cache):
+        """Returns (key, cached response), key is None when caching is off"""
+        key = self._cache_key(system_prompt, input, schema, use_cache)
+        if key is None or not use_cache:
+            return key, None
+        cached = self.cache.get(key, schema)
+        self._count_lookup(cached)
+        return key, cached
+
+    async def _acache_lookup(self, system_prompt, input, schema, use_cache):
+        """_cache_lookup with the SQLite tier read off the event loop"""
+        key = self._cache_key(system_prompt, input, schema, use_cache)
+        if key is None or not use_cache:
+            return key, None
+        cached = await self.cache.aget(key, schema)
+        self._count_lookup(cached)
+        return key, cached
+
+    def _unwrap(self, response, schema):
+        """Parsed value of a chain response, records its token usage"""
+        agent = type(self).__name__
+        if schema is None:
+            metrics.record_usage(agent, getattr(response, "usage_metadata", None))
+            return response.content
+        metrics.record_usage(agent, getattr(response["raw"], "usage_metadata", None))
+        if response["parsing_error"] is not None:
+            raise response["parsing_error"]
+        return response["parsed"]
+
+    def _record_call(self, mode, system_prompt, input, start, failed=False):
+        agent = type(self).__name__
+        metrics.llm_seconds.observe(time.perf_counter() - start, agent=agent, mode=mode)
+        metrics.llm_prompt_chars.observe(
+            len(system_prompt or "") + len(input or ""), agent=agent
+        )
+        if failed:
+            metrics.llm_errors.inc(agent=agent)
+
+    def _cache_store(self, key, response):
+        if key is not None and response is not None:
+            self.cache.set(key, response)
+
+    async def _acache_store(self, key, response):
+        if key is not None and response is not None:
+            await self.cache.aset(key, response)
+
+    def run(
+        self,
+        system_prompt: str,
+        input: str,
+        schema: Type[T] = None,
+        use_cache: bool = True,
+    ) -> T:
+        """Run the agent with human input.
+
+        Returns None on errors, except LLMUnavailableError which is raised once
+        the scheduler's retries are used up.
+        """
+        try:
+            key, cached = self._cache_lookup(system_prompt, input, schema, use_cache)
+            if cached is not None:
+                return cached
+            chain = self._build_chain(schema)
+            start = time.perf_counter()
+            payload = {"system_prompt": system_prompt, "input": input}
+            try:
+                response = self.scheduler.call(
+                    lambda: self._unwrap(chain.invoke(payload), schema)
+                )
+            except Exception:
+                self._record_call("sync", system_prompt, input, start, failed=True)
+                raise
+            self._record_call("sync", system_prompt, input, start)
+            self._cache_store(key, response)
+            return response
+        except LLMUnavailableError:
+            # the caller has to know the model is down, not just get None
+            raise
+        except Exception as e:
+            print(f"Error running client: {e}")
+            return None
+
+    async def arun(
+        self,
+        system_prompt: str,
+        input: str,
+        schema: Type[T] = None,
+        use_cache: bool = True,
+    ) -> T:
+        """Awaitable version of run, does not block the event loop."""
+        try:
+            key, cached = await self._acache_lookup(
+                system_prompt, input, schema, use_cache
+            )
+            if cached is not None:
+                return cached
+            chain = self._build_chain(schema)
+            start = time.perf_counter()
+            payload = {"system_prompt": system_prompt, "input": input}
+
+            async def call():
+                return self._unwrap(await chain.ainvoke(payload), schema)
+
+            try:
+                flight_key = key or LLMCacheRepository.make_key(
+                    self.MODEL, system_prompt, input, schema
                 )
-                return response.content
+                response = await self.scheduler.submit(flight_key, call)
+            except Exception:
+                self._record_call("async", system_prompt, input, start, failed=True)
+                raise
+            self._record_call("async", system_prompt, input, start)
+            await self._acache_store(key, response)
+            return response
+        except LLMUnavailableError:
+            # the caller has to know the model is down, not just get None
+            raise
         except Exception as e:
             print(f"Error running client: {e}")
             return None
+
+    async def astream(
+        self, system_prompt: str, input: str, use_cache: bool = True
+    ) -> AsyncIterator[str]:
+        """Stream the raw text response chunk by chunk."""
+        key, cached = await self._acache_lookup(system_prompt, input, None, use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        chain = self._build_chain()
+        parts = []
+        await self.scheduler.throttle()
+        start = time.perf_counter()
+        try:
+            async for chunk in chain.astream(
+                {"system_prompt": system_prompt, "input": input}
+            ):
+                metrics.record_usage(
+                    type(self).__name__, getattr(chunk, "usage_metadata", None)
+                )
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield chunk.content
+        except Exception:
+            self._record_call("stream", system_prompt, input, start, failed=True)
+            raise
+        self._record_call("stream", system_prompt, input, start)
+        await self._acache_store(key, "".join(parts))
@@ -1,7 +1,11 @@
 from backend.agents.base_agent import BaseAgent
+from backend.service.llm_scheduler import LLMUnavailableError
 import json
-import re
 from backend.schema.schemas import IntakeOutput
+from backend.util.terminology import TerminologyNormalizer
+from backend.service.jurisdiction_service import JurisdictionResolver
+from backend.util.dependencies import getRuleBook
+import os
 from typing import Optional, Dict
 
 
@@ -12,46 +16,68 @@ class IntakeAgent(BaseAgent):
         self.continent = mapping.get("continent", {})
         self.terminology = mapping.get("terminology", {})
 
-        self.sorted_terms = (
-            sorted(self.terminology.keys(), key=len, reverse=True)
-            if self.terminology
-            else []
-        )
+        self.normalizer = TerminologyNormalizer(self.terminology)
+        self.sorted_terms = self.normalizer.sorted_terms
+
+        self.resolver = JurisdictionResolver(mapping, self.fetch_jurisdictions())
+        self.stats = {"gazetteer": 0, "llm_empty": 0, "llm_ambiguous": 0}
 
     def fetch_mapping(self):
         try:
-            with open("backend/util/mapping.json", "r", encoding="utf-8") as f:
+            mapping_path = os.path.join(
+                os.path.dirname(__file__), "..", "util", "mapping.json"
+            )
+            with open(mapping_path, "r", encoding="utf-8") as f:
                 return json.load(f)
         except Exception as e:
             print(f"Error fetching mapping: {e}")
             return {}
 
+    def fetch_jurisdictions(self):
+        """Jurisdiction codes present in the rulebook"""
+        try:
+            return getRuleBook().regions()
+        except Exception as e:
+            print(f"Error fetching jurisdictions: {e}")
+            return []
+
     def clean_text(self, input: str) -> str:
         cleaned_text = input.strip()
         return cleaned_text
 
     def normalization(self, input_text: str) -> str:
-        for term in self.sorted_terms:
-            pattern = re.compile(r"\b" + re.escape(term) + r"\b", re.IGNORECASE)
-            replacement = f"{term} ({self.terminology[term]})"
-            input_text = pattern.sub(replacement, input_text)
-        return input_text
+        return self.normalizer.normalize(input_text)
+
+    async def extract_region(self, input_text: str) -> Dict[str, Optional[str]]:
+        resolved, outcome = self.resolver.resolve(input_text)
+        if resolved is not None:
+            self.stats["gazetteer"] += 1
+            return resolved.model_dump()
+        self.stats[f"llm_{outcome}"] += 1
 
-    def extract_region(self, input_text: str) -> Dict[str, Optional[str]]:
         try:
             system_prompt = self.get_system_prompt("legal_agent")
         except Exception as e:
             print(f"Error getting system prompt for intake agent: {e}")
             return None
         try:
-            response: IntakeOutput = self.run(system_prompt, input_text, IntakeOutput)
+            response: IntakeOutput = await self.arun(
+                system_prompt, input_text, IntakeOutput
+            )
+            if response is None:
+                print("Intake agent got no response from Gemini")
+                return None
             response.continent = self.continent.get(
                 response.continent, response.continent
             )
-            if response.states:
+            if response.states and not response.states.startswith(
+                f"{response.country}-"
+            ):
                 response.states = f"{response.country}-{response.states}"
 
             return response.model_dump()
+        except LLMUnavailableError:
+            raise
         except Exception as e:
             print(f"Error getting response from intake agent: {e}")
             return None
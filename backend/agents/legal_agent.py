@@ -1,19 +1,45 @@
 from backend.agents.base_agent import BaseAgent
+from collections import Counter
+import asyncio
 import re
+import yaml
+
+HEADING_RE = re.compile(r"^(?:#{1,6}\s|SEC\.\s|SECTION\s|§)", re.IGNORECASE)
+LIST_KEYS = {
+    "definitions": ("term",),
+    "obligations": ("subject", "action"),
+    "prohibitions": ("subject", "forbidden"),
+    "disclosures_reporting": ("subject", "requirement"),
+}
+HEADER_CHARS = 1000
+# smallest chunk body, whatever LEGAL_CHUNK_CHARS and the header leave
+MIN_CHUNK_CHARS = 1000
+MISSING = {"", "unknown", "null", "none", "n/a"}
+
+
+def is_missing(value) -> bool:
+    """None, empty, or a placeholder like "unknown" the prompt allows for unclear values"""
+    if value is None:
+        return True
+    return isinstance(value, str) and value.strip().lower() in MISSING
 
 
 class LegalAgent(BaseAgent):
     def __init__(self):
         super().__init__()
 
-    def extract_legals(self, markdown_output: str) -> str:
+    async def extract_legals(self, markdown_output: str) -> str:
+        """Markdown to rulebook YAML, long documents are extracted chunk by chunk"""
+        if len(markdown_output) > self.config.LEGAL_CHUNK_CHARS:
+            return await self.extract_legals_chunked(markdown_output)
+
         try:
             system_prompt = self.get_system_prompt("legal_agent")
         except Exception as e:
             print(f"Error getting prompt for LegalAgent: {e}")
 
         try:
-            yaml_str = self.run(system_prompt, markdown_output)
+            yaml_str = await self.arun(system_prompt, markdown_output)
             yaml_str = self.clean_yaml(yaml_str)
             return yaml_str
         except Exception as e:
@@ -26,3 +52,142 @@ class LegalAgent(BaseAgent):
         yaml_str = yaml_str.replace(r"\(", r"\\(").replace(r"\)", r"\\)")
         yaml_str = yaml_str.encode("utf-8", "ignore").decode("utf-8")
         return yaml_str.strip()
+
+    def split_markdown(self, markdown: str, max_chars: int) -> list:
+        """Split on heading/section boundaries, packing sections up to max_chars"""
+        if max_chars < 1:
+            raise ValueError(f"max_chars must be positive, got {max_chars}")
+        sections, current = [], []
+        for line in markdown.splitlines(keepends=True):
+            if HEADING_RE.match(line) and current:
+                sections.append("".join(current))
+                current = []
+            current.append(line)
+        if current:
+            sections.append("".join(current))
+
+        chunks, chunk = [], ""
+        for section in sections:
+            # a single oversized section is cut on paragraph breaks
+            parts = [section]
+            if len(section) > max_chars:
+                parts = re.split(r"(?<=\n\n)", section)
+            for part in parts:
+                if chunk and len(chunk) + len(part) > max_chars:
+                    chunks.append(chunk)
+                    chunk = ""
+                while len(part) > max_chars:
+                    cut = part.rfind(" ", 0, max_chars) + 1 or max_chars
+                    chunks.append(part[:cut])
+                    part = part[cut:]
+                chunk += part
+        if chunk.strip():
+            chunks.append(chunk)
+        return chunks
+
+    def document_header(self, markdown: str) -> str:
+        """Title block of a document: its text up to the second heading, capped"""
+        lines = []
+        for line in markdown.splitlines(keepends=True):
+            if HEADING_RE.match(line) and any(HEADING_RE.match(h) for h in lines):
+                break
+            lines.append(line)
+        header = "".join(lines).strip()
+        if len(header) > HEADER_CHARS:
+            header = header[:HEADER_CHARS].rsplit(" ", 1)[0]
+        return header
+
+    async def extract_legals_chunked(self, markdown_output: str) -> str:
+        """Map-reduce extraction: every chunk in parallel, then one merged YAML.
+
+        Chunks after the first are prefixed with the document's title block so
+        each of them can still name the document and its jurisdiction.
+        """
+        header = self.document_header(markdown_output)
+        body_chars = max(MIN_CHUNK_CHARS, self.config.LEGAL_CHUNK_CHARS - len(header))
+        chunks = self.split_markdown(markdown_output, body_chars)
+        chunks = chunks[:1] + [
+            f"Document header (for the source fields only):\n{header}\n\n---\n\n{chunk}"
+            for chunk in chunks[1:]
+        ]
+        system_prompt = self.get_system_prompt("legal_agent")
+        semaphore = asyncio.Semaphore(self.config.LEGAL_CHUNK_CONCURRENCY)
+        print(f"Extracting legal abstract in {len(chunks)} chunks")
+
+        async def extract(chunk: str):
+            async with semaphore:
+                yaml_str = await self.arun(system_prompt, chunk)
+            if not yaml_str:
+                return None
+            try:
+                return yaml.safe_load(self.clean_yaml(yaml_str))
+            except Exception as e:
+                print(f"YAML parse error in chunk, skipping: {e}")
+                return None
+
+        documents = await asyncio.gather(*(extract(chunk) for chunk in chunks))
+        documents = [d for d in documents if isinstance(d, dict)]
+        if not documents:
+            raise ValueError("Error during extraction of legal abstract: no chunk")
+        merged = self.merge_extractions(documents)
+        return yaml.dump(merged, allow_unicode=True, sort_keys=False).strip()
+
+    def merge_extractions(self, documents: list) -> dict:
+        merged = {}
+
+        # the first chunk holds the title, so its source wins; later chunks
+        # only fill fields it left missing
+        sources = [d.get("source") or {} for d in documents]
+        source = {}
+        for document_source in sources:
+            for key, value in document_source.items():
+                if key not in source or (
+                    is_missing(source[key]) and not is_missing(value)
+                ):
+                    source[key] = value
+        if is_missing(sources[0].get("jurisdiction")):
+            jurisdictions = Counter(
+                s.get("jurisdiction")
+                for s in sources
+                if not is_missing(s.get("jurisdiction"))
+            )
+            if jurisdictions:
+                source["jurisdiction"] = jurisdictions.most_common(1)[0][0]
+        merged["source"] = source
+
+        for section, identity in LIST_KEYS.items():
+            seen, items = set(), []
+            for document in documents:
+                for item in document.get(section) or []:
+                    key = tuple(
+                        str(item.get(k, "")).strip().lower()
+                        if isinstance(item, dict)
+                        else str(item)
+                        for k in identity
+                    )
+                    if key not in seen:
+                        seen.add(key)
+                        items.append(item)
+            merged[section] = items
+
+        enforcement = {}
+        for document in documents:
+            for key, value in (document.get("enforcement") or {}).items():
+                if enforcement.get(key) in (None, [], {}) and value is not None:
+                    enforcement[key] = value
+        merged["enforcement"] = enforcement or None
+
+        severability = [d.get("severability") for d in documents]
+        merged["severability"] = (
+            True
+            if True in severability
+            else next((s for s in severability if s is not None), None)
+        )
+
+        notes = []
+        for document in documents:
+            for note in document.get("notes") or []:
+                if note not in notes:
+                    notes.append(note)
+        merged["notes"] = notes
+        return merged
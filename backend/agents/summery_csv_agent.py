@@ -1,9 +1,14 @@
 import json
 import os
 import csv
-import yaml
+import io
 import re
 from backend.agents.base_agent import BaseAgent
+from backend.service.llm_scheduler import LLMUnavailableError
+from backend.util.prompt_registry import prompt_registry
+from backend.schema.schemas import AnalzyerOutput
+from typing import Iterator
+from pydantic import BaseModel
 
 
 class SummeryCsvAgent(BaseAgent):
@@ -17,27 +22,69 @@ class SummeryCsvAgent(BaseAgent):
         )
         outputs_dir = os.path.join(os.path.dirname(__file__), "outputs")
         os.makedirs(outputs_dir, exist_ok=True)
+        self.required_fields = [
+            "geolocation",
+            "severity",
+            "law",
+            "reasoning",
+            "potential_violations",
+            "recommendations",
+            "legal_references",
+            "geo_compliance_flag",
+        ]
+        self.empty_values = {"", "n/a", "na", "none", "no violation", "no violations"}
+        self.flagged_severities = {"critical", "high", "medium"}
 
-    def generate_summary_csv(self):
+    def _has_value(self, value) -> bool:
+        return str(value or "").strip().lower() not in self.empty_values
+
+    def project_summary(self, analyser_data) -> list:
+        """Summary rows built directly from the analyzer output, no LLM call"""
+        if isinstance(analyser_data, BaseModel):
+            analyser_data = analyser_data.model_dump()
+        row = {key: analyser_data.get(key, "N/A") for key in self.required_fields[:-1]}
+        needs_geo_logic = self._has_value(row["geolocation"]) and (
+            self._has_value(row["potential_violations"])
+            or str(row["severity"]).strip().lower() in self.flagged_severities
+        )
+        row["geo_compliance_flag"] = "REQUIRED" if needs_geo_logic else "NOT REQUIRED"
+        return [row]
+
+    async def summarize(self, analyser_data, use_llm: bool = False) -> list:
+        """Summary rows for one analysis, the Gemini summariser is opt-in"""
+        if use_llm:
+            try:
+                summary = await self.generate_summary_csv(analyser_data)
+            except LLMUnavailableError as e:
+                print(f"LLM summary unavailable: {e}")
+                summary = None
+            if summary:
+                return summary
+            print("LLM summary failed, falling back to projection")
+        return self.project_summary(analyser_data)
+
+    async def generate_summary_csv(self, analyser_data=None):
         """
         Reads analyser_agent.json, sends to Gemini with a prompt from prompts.yaml, extracts summary, and outputs required fields to a CSV file.
+        If analyser_data (dict or AnalzyerOutput) is given it is summarised directly instead of reading the file.
         """
-        if not os.path.exists(self.input_file):
-            print(f"Input file not found: {self.input_file}")
-            return None
-        try:
-            with open(self.input_file, "r", encoding="utf-8") as f:
-                analyser_data = json.load(f)
-        except Exception as e:
-            print(f"Error reading analyser_agent.json: {e}")
-            return None
+        if isinstance(analyser_data, BaseModel):
+            analyser_data = analyser_data.model_dump()
+        if analyser_data is None:
+            if not os.path.exists(self.input_file):
+                print(f"Input file not found: {self.input_file}")
+                return None
+            try:
+                with open(self.input_file, "r", encoding="utf-8") as f:
+                    analyser_data = json.load(f)
+            except Exception as e:
+                print(f"Error reading analyser_agent.json: {e}")
+                return None
 
         # Load prompt from prompts.yaml
-        prompt_path = os.path.join(os.path.dirname(__file__), "prompts", "prompts.yaml")
-        with open(prompt_path, "r", encoding="utf-8") as pf:
-            prompts_yaml = yaml.safe_load(pf)
-        print("Available prompts:", prompts_yaml["prompts"].keys())
-        prompt_template = prompts_yaml["prompts"].get("summery_csv_agent")
+        prompt_template = prompt_registry.get_prompt(
+            self.PROMPTS_PATH, "summery_csv_agent"
+        )
         if not prompt_template:
             print("Error: 'summery_csv_agent' prompt not found in prompts.yaml.")
             return None
@@ -46,7 +93,7 @@ class SummeryCsvAgent(BaseAgent):
             self.get_system_prompt("summary_agent")
             or "You are a legal compliance summarizer."
         )
-        response = self.run(system_prompt, input_text)
+        response = await self.arun(system_prompt, input_text)
         # print("Gemini response:", response)
         if not response:
             print("No response from Gemini agent.")
@@ -73,54 +120,57 @@ class SummeryCsvAgent(BaseAgent):
             print(f"Error parsing Gemini response: {e}")
             return None
 
+    def build_rows(self, summary_list, original_data):
+        """Merge Gemini summary rows with the analyser context, returns (fieldnames, rows)"""
+        if isinstance(original_data, BaseModel):
+            original_data = original_data.model_dump()
+        if isinstance(summary_list, dict):
+            summary_list = [summary_list]
+        # If original_data is a dict, convert to list
+        if isinstance(original_data, dict):
+            original_data = [original_data]
+        # Collect all keys from Gemini and original JSON
+        all_keys = set()
+        for row in summary_list:
+            all_keys.update(row.keys())
+        for row in original_data:
+            all_keys.update(row.keys())
+        fieldnames = self.required_fields + [
+            k for k in all_keys if k not in self.required_fields
+        ]
+        rows = []
+        for i, row in enumerate(summary_list):
+            # Always include geolocation and other context from original JSON
+            context_row = original_data[i] if i < len(original_data) else {}
+            # Always set geolocation from context_row if present
+            if "geolocation" in context_row:
+                row["geolocation"] = context_row["geolocation"]
+            for key in self.required_fields:
+                if key not in row and key in context_row:
+                    row[key] = context_row[key]
+            # Add Gemini's geo-specific compliance flag if not present
+            if "geo_compliance_flag" not in row:
+                row["geo_compliance_flag"] = (
+                    "REQUIRED" if row.get("geolocation") else "NOT REQUIRED"
+                )
+            rows.append(row)
+        return fieldnames, rows
+
+    def write_csv(self, csvfile, fieldnames, rows):
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
     def get_csv(self, summary_list: dict) -> str:
         # Write to CSV
         try:
-            if isinstance(summary_list, dict):
-                summary_list = [summary_list]
             # Load original analyser_data for context
             with open(self.input_file, "r", encoding="utf-8") as f:
                 original_data = json.load(f)
-            # If original_data is a dict, convert to list
-            if isinstance(original_data, dict):
-                original_data = [original_data]
-            # Collect all keys from Gemini and original JSON
-            all_keys = set()
-            for row in summary_list:
-                all_keys.update(row.keys())
-            for row in original_data:
-                all_keys.update(row.keys())
-            required_fields = [
-                "geolocation",
-                "severity",
-                "law",
-                "reasoning",
-                "potential_violations",
-                "recommendations",
-                "legal_references",
-                "geo_compliance_flag",
-            ]
-            fieldnames = required_fields + [
-                k for k in all_keys if k not in required_fields
-            ]
+            fieldnames, rows = self.build_rows(summary_list, original_data)
             with open(self.output_file, "w", newline="", encoding="utf-8") as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                for i, row in enumerate(summary_list):
-                    # Always include geolocation and other context from original JSON
-                    context_row = original_data[i] if i < len(original_data) else {}
-                    # Always set geolocation from context_row if present
-                    if "geolocation" in context_row:
-                        row["geolocation"] = context_row["geolocation"]
-                    for key in required_fields:
-                        if key not in row and key in context_row:
-                            row[key] = context_row[key]
-                    # Add Gemini's geo-specific compliance flag if not present
-                    if "geo_compliance_flag" not in row:
-                        row["geo_compliance_flag"] = (
-                            "REQUIRED" if row.get("geolocation") else "NOT REQUIRED"
-                        )
-                    writer.writerow(row)
+                self.write_csv(csvfile, fieldnames, rows)
 
             print(f"Summary CSV saved to {self.output_file}")
             return self.output_file
@@ -128,10 +178,50 @@ class SummeryCsvAgent(BaseAgent):
             print(f"Error writing CSV: {e}")
             return None
 
+    def history_fieldnames(self) -> list:
+        """Fixed columns of the history export, which is written before all rows are known"""
+        extra = [
+            k for k in AnalzyerOutput.model_fields if k not in self.required_fields
+        ]
+        return self.required_fields + extra + ["result_id", "created_at"]
 
-if __name__ == "__main__":
+    def iter_csv(self, rows: Iterator[dict], batch_size: int = 200) -> Iterator[str]:
+        """CSV text in pieces of `batch_size` rows, for streaming responses"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(
+            buffer, fieldnames=self.history_fieldnames(), extrasaction="ignore"
+        )
+        writer.writeheader()
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if count % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def get_csv_text(self, rows: list) -> str:
+        """Render already merged rows (see build_rows) as CSV text"""
+        all_keys = set()
+        for row in rows:
+            all_keys.update(row.keys())
+        fieldnames = self.required_fields + sorted(
+            k for k in all_keys if k not in self.required_fields
+        )
+        buffer = io.StringIO()
+        self.write_csv(buffer, fieldnames, rows)
+        return buffer.getvalue()
+
+
+async def main():
     agent = SummeryCsvAgent()
-    response = agent.generate_summary_csv()
+    response = await agent.generate_summary_csv()
     print(response)
     result = agent.get_csv(response)
     print("CSV output file:", result)
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(main())
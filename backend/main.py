@@ -1,27 +1,51 @@
-from backend.agents.legal_agent import LegalAgent
-from backend.repository.rulebook_repo import RulebookRepository
-from backend.service.crawler_service import CrawlerService
-from backend.agents.analyzer_agent import AnalyzerAgent
-from backend.agents.intake_agent import IntakeAgent
-from backend.service.excel_service import ExcelService
-from backend.agents.summery_csv_agent import SummeryCsvAgent
-from fastapi import FastAPI, Query, HTTPException
+from backend.schema.schemas import BatchAnalyzeRequest
+from backend.util.config import getConfig
+from backend.util.metrics import metrics, request_timings
+from backend.util.dependencies import (
+    getExcelService,
+    getHistory,
+    getIntakeAgent,
+    getJobQueue,
+    getPipeline,
+    getResultStore,
+    getSummeryCsvAgent,
+)
+from fastapi import (
+    FastAPI,
+    Query,
+    HTTPException,
+    UploadFile,
+    File,
+    BackgroundTasks,
+    Request,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
+from backend.service.job_service import QueueFullError
+from backend.service.llm_scheduler import LLMUnavailableError
+from contextlib import asynccontextmanager
+import asyncio
 import json
-import os
+import time
+
+# Services and agents are built on first use, see backend.util.dependencies
+
 
-# Initialize services and agents
-RuleBook = RulebookRepository()
-CrawlerMain = CrawlerService()
-ExcelMain = ExcelService()
-LegalAgentMain = LegalAgent()
-AnalyzerAgentMain = AnalyzerAgent()
-IntakeAgentMain = IntakeAgent()
-SummeryCsvAgentMain = SummeryCsvAgent()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # picks up jobs left queued or running by the previous process
+    queue = getJobQueue()
+    await queue.start()
+    yield
+    await queue.stop()
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,47 +56,246 @@ app.add_middleware(
 )
 
 
-@app.get("/analyze")
-async def analyze(text: str = Query(..., description="Text to analyze")):
+@app.middleware("http")
+async def timing_headers(request: Request, call_next):
+    """Adds Server-Timing (per stage) and X-Process-Time when TIMING_HEADERS=true"""
+    if not getConfig().TIMING_HEADERS:
+        return await call_next(request)
+    timings = {}
+    token = request_timings.set(timings)
+    start = time.perf_counter()
     try:
-        # Process the input text
-        cleaned_text = IntakeAgentMain.normalization(text)
-        region = IntakeAgentMain.extract_region(cleaned_text)
+        response = await call_next(request)
+    finally:
+        request_timings.reset(token)
+    total = time.perf_counter() - start
+    entries = [
+        f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()
+    ]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    response.headers["Server-Timing"] = ", ".join(entries)
+    response.headers["X-Process-Time"] = f"{total:.4f}"
+    return response
+
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable(request: Request, exc: LLMUnavailableError):
+    """Quota exhaustion is a 429, any other lasting model outage a 503"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(getConfig().LLM_BACKOFF_MAX))},
+    )
+
+
+def persist_record(job_id: str):
+    with metrics.stage("persist"):
+        getResultStore().persist(job_id)
 
-        # Analyze the text
-        result = await AnalyzerAgentMain.analyze_question(cleaned_text, region)
 
-        # Save and return results
-        with open("agents/outputs/analyzer_output.json", "w", encoding="utf-8") as f:
-            output = result.model_dump()
-            json.dump(output, f, indent=2, ensure_ascii=False)
-            print("Analysis saved to analyzer_output.json")
-        result = SummeryCsvAgentMain.generate_summary_csv()
-        SummeryCsvAgentMain.get_csv(result)
+def get_record(job_id: str = None):
+    store = getResultStore()
+    record = store.get(job_id) if job_id else store.latest()
+    if record is None:
+        raise HTTPException(status_code=404, detail="Result not found")
+    return record
+
+
+@app.get("/analyze")
+async def analyze(
+    background_tasks: BackgroundTasks,
+    text: str = Query(..., description="Text to analyze"),
+    llm_summary: bool = Query(None, description="Summarise with Gemini"),
+):
+    try:
+        record = await getPipeline().analyze(text, llm_summary)
+        store = getResultStore()
+        if store.persist_dir:
+            background_tasks.add_task(persist_record, record["id"])
 
         return {
             "status": "success",
-            "data": output,
+            "id": record["id"],
+            "data": record["data"].model_dump(),
+            "reused_from": record.get("reused_from"),
+            "similarity": record.get("similarity"),
             "message": "Analysis completed successfully",
         }
 
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/analyze/stream")
+async def analyze_stream(
+    text: str = Query(..., description="Text to analyze"),
+    llm_summary: bool = Query(None, description="Summarise with Gemini"),
+):
+    """Server-sent events: normalized, jurisdiction, token..., analysis, summary"""
+
+    async def events():
+        store = getResultStore()
+        async for event in getPipeline().stream(text, llm_summary):
+            data = json.dumps(event["data"], ensure_ascii=False, default=str)
+            yield f"event: {event['event']}\ndata: {data}\n\n"
+            if event["event"] == "summary" and store.persist_dir:
+                await asyncio.to_thread(persist_record, event["data"]["id"])
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def run_batch(
+    background_tasks: BackgroundTasks, features: list, concurrency: int = None
+):
+    if not features:
+        raise HTTPException(status_code=400, detail="No features to analyze")
+    if concurrency is not None and concurrency < 1:
+        raise HTTPException(status_code=400, detail="concurrency must be >= 1")
+
+    pipeline = getPipeline()
+    store = getResultStore()
+    results = await pipeline.analyze_batch(features, concurrency)
+    if store.persist_dir:
+        for result in results:
+            if result["status"] == "success":
+                background_tasks.add_task(persist_record, result["id"])
+    failed = sum(1 for result in results if result["status"] != "success")
+    return {
+        "status": "success" if not failed else "partial",
+        "data": results,
+        "csv": pipeline.combined_csv(results),
+        "message": f"Analyzed {len(results) - failed}/{len(results)} features",
+    }
+
+
+@app.post("/analyze/batch")
+async def analyze_batch(
+    request: BatchAnalyzeRequest, background_tasks: BackgroundTasks
+):
+    """Analyze a list of feature descriptions concurrently"""
+    return await run_batch(background_tasks, request.features, request.concurrency)
+
+
+@app.post("/analyze/batch/upload")
+async def analyze_batch_upload(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="Dataset in .xlsx or .csv format"),
+    concurrency: int = Query(None, description="Max features analyzed at once"),
+):
+    """Analyze every row (feature name + description) of an uploaded dataset"""
+    excel = getExcelService()
+    try:
+        df = excel.read_upload(await file.read(), file.filename or "")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid dataset: {e}")
+    return await run_batch(background_tasks, excel.get_contents(df), concurrency)
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    text: str = Query(..., description="Text to analyze"),
+    llm_summary: bool = Query(None, description="Summarise with Gemini"),
+):
+    """Queue an analysis and return its job id right away, poll /jobs/{id}"""
+    try:
+        job_id = await getJobQueue().submit(text, llm_summary)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"status": "queued", "id": job_id}
+
+
+@app.get("/jobs/stats")
+def fetch_job_stats():
+    return getJobQueue().stats()
+
+
+@app.get("/jobs/{job_id}")
+def fetch_job(job_id: str):
+    """Status of a queued analysis, with its result once done"""
+    job = getJobQueue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
 @app.get("/result")
-async def fetch_output():
-    """ " """
-    result = SummeryCsvAgentMain.generate_summary_csv()
-    return result
+@app.get("/result/{job_id}")
+async def fetch_output(job_id: str = None):
+    """Stored summary of the given analysis. Without an id the latest one is
+    returned, which may belong to another client's concurrent request."""
+    return get_record(job_id)["summary"]
+
+
+@app.get("/cache/stats")
+def fetch_cache_stats():
+    """Hit/miss counters of the LLM response cache"""
+    cache = getSummeryCsvAgent().cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.get_stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def fetch_metrics():
+    """Pipeline stage and model call metrics in the Prometheus text format"""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/intake/stats")
+def fetch_intake_stats():
+    """How many regions were resolved locally vs by the LLM"""
+    stats = getIntakeAgent().stats
+    total = sum(stats.values())
+    return {
+        **stats,
+        "llm_skip_rate": stats["gazetteer"] / total if total else 0.0,
+    }
 
 
 @app.get("/summary")
-def fetch_csv():
-    """To download csv from frontend"""
-    file_path = "agents/outputs/summery.csv"
+def fetch_csv(
+    since: float = Query(None, description="Rows created at or after (epoch s)"),
+    until: float = Query(None, description="Rows created before (epoch s)"),
+    jurisdiction: str = Query(None, description="Geolocation, e.g. US-CA"),
+    severity: str = Query(None, description="e.g. High"),
+    flag: str = Query(None, description="REQUIRED or NOT REQUIRED"),
+    limit: int = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+):
+    """To download csv from frontend: every analysis so far, streamed and filterable"""
+    history = getHistory()
+    filters = {
+        "since": since,
+        "until": until,
+        "jurisdiction": jurisdiction,
+        "severity": severity,
+        "flag": flag,
+    }
+    rows = history.iter_rows(**filters, limit=limit, offset=offset)
+    return StreamingResponse(
+        getSummeryCsvAgent().iter_csv(rows),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": 'attachment; filename="summery.csv"',
+            "X-Total-Count": str(history.count(**filters)),
+        },
+    )
 
-    if not os.path.exists(file_path):
-        return {"error": "CSV file not found."}
 
-    return FileResponse(path=file_path, filename="summery.csv", media_type="text/csv")
+@app.get("/summary/{job_id}")
+def fetch_job_csv(job_id: str):
+    """CSV of a single analysis"""
+    record = get_record(job_id)
+    return Response(
+        content=getSummeryCsvAgent().get_csv_text(record["rows"]),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="summery.csv"'},
+    )
@@ -0,0 +1,128 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class ResultHistoryRepository:
+    """Append-only SQLite log of every summary row ever produced.
+
+    Rows are never updated or deleted. They are indexed by time, jurisdiction
+    (the row's geolocation) and severity, and `iter_rows` reads them back in
+    batches so an export never holds more than `batch_size` rows in memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS history (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                result_id TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                geolocation TEXT COLLATE NOCASE,
+                severity TEXT COLLATE NOCASE,
+                geo_compliance_flag TEXT COLLATE NOCASE,
+                row TEXT NOT NULL
+            )
+            """
+        )
+        for column in ("created_at", "geolocation", "severity"):
+            self.conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_history_{column} "
+                f"ON history ({column}, seq)"
+            )
+        self.conn.commit()
+
+    def append(self, result_id: str, rows: List[Dict[str, Any]], created_at=None):
+        created_at = created_at or time.time()
+        values = [
+            (
+                result_id,
+                created_at,
+                row.get("geolocation"),
+                row.get("severity"),
+                row.get("geo_compliance_flag"),
+                json.dumps(row, ensure_ascii=False, default=str),
+            )
+            for row in rows
+        ]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO history (result_id, created_at, geolocation, severity, "
+                "geo_compliance_flag, row) VALUES (?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            self.conn.commit()
+
+    @staticmethod
+    def _where(since, until, jurisdiction, severity, flag) -> tuple:
+        clauses, params = [], []
+        for clause, value in (
+            ("created_at >= ?", since),
+            ("created_at < ?", until),
+            ("geolocation = ?", jurisdiction),
+            ("severity = ?", severity),
+            ("geo_compliance_flag = ?", flag),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return clauses, params
+
+    def iter_rows(
+        self,
+        since: float = None,
+        until: float = None,
+        jurisdiction: str = None,
+        severity: str = None,
+        flag: str = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        batch_size: int = 500,
+    ) -> Iterator[Dict[str, Any]]:
+        """Matching rows oldest first, each with its result_id and created_at"""
+        clauses, params = self._where(since, until, jurisdiction, severity, flag)
+        remaining = limit
+        last_seq = None
+        skip = offset
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            where = clauses + (["seq > ?"] if last_seq is not None else [])
+            query = "SELECT seq, result_id, created_at, row FROM history"
+            if where:
+                query += " WHERE " + " AND ".join(where)
+            query += " ORDER BY seq LIMIT ? OFFSET ?"
+            batch_params = params + ([last_seq] if last_seq is not None else [])
+            with self.lock:
+                batch = self.conn.execute(query, (*batch_params, size, skip)).fetchall()
+            if not batch:
+                return
+            skip = 0
+            for seq, result_id, created_at, row in batch:
+                yield {
+                    **json.loads(row),
+                    "result_id": result_id,
+                    "created_at": created_at,
+                }
+            last_seq = batch[-1][0]
+            if remaining is not None:
+                remaining -= len(batch)
+
+    def count(
+        self, since=None, until=None, jurisdiction=None, severity=None, flag=None
+    ) -> int:
+        clauses, params = self._where(since, until, jurisdiction, severity, flag)
+        query = "SELECT COUNT(*) FROM history"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self.lock:
+            return self.conn.execute(query, params).fetchone()[0]
@@ -0,0 +1,108 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+
+class JobRepository:
+    """SQLite store of background analysis jobs, so they survive a restart.
+
+    A job goes queued -> running -> done | failed. Jobs still queued or running
+    when the process stopped are handed back by `unfinished` to be re-run.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                text TEXT NOT NULL,
+                llm_summary INTEGER,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)"
+        )
+        self.conn.commit()
+
+    def create(self, text: str, llm_summary: bool = None) -> str:
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO jobs (id, status, text, llm_summary, created_at) "
+                "VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, text, llm_summary, time.time()),
+            )
+            self.conn.commit()
+        return job_id
+
+    def mark_running(self, job_id: str):
+        self._update(job_id, status="running", started_at=time.time())
+
+    def mark_done(self, job_id: str, result: Dict[str, Any]):
+        self._update(
+            job_id,
+            status="done",
+            result=json.dumps(result, ensure_ascii=False, default=str),
+            finished_at=time.time(),
+        )
+
+    def mark_failed(self, job_id: str, error: str):
+        self._update(job_id, status="failed", error=error, finished_at=time.time())
+
+    def _update(self, job_id: str, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self.lock:
+            self.conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id)
+            )
+            self.conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = self._decode(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def _decode(self, row) -> Dict[str, Any]:
+        job = dict(row)
+        if job["llm_summary"] is not None:
+            job["llm_summary"] = bool(job["llm_summary"])
+        return job
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Queued or interrupted jobs, oldest first"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, text, llm_summary FROM jobs "
+                "WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        return {status: count for status, count in rows}
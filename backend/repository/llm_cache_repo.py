@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Type
+
+from pydantic import BaseModel
+
+
+class LLMCacheRepository:
+    """Content-addressed cache of LLM responses.
+
+    Two tiers: an in-memory LRU in front of a SQLite table. Entries expire after
+    `ttl` seconds and the SQLite tier is trimmed (least recently used first) once
+    it grows past `max_bytes`.
+
+    The size of the SQLite tier is kept as a running total, expired rows are
+    swept at most every `sweep_interval` seconds and disk hits only queue their
+    `accessed_at` update, which is written with the next `set` (or once
+    `touch_batch` are queued). Async callers use `aget`/`aset`, which serve
+    memory hits directly and run the SQLite work in a thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: int = 7 * 24 * 3600,
+        max_entries: int = 512,
+        max_bytes: int = 64 * 1024 * 1024,
+        sweep_interval: float = 60.0,
+        touch_batch: int = 64,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.touch_batch = touch_batch
+        self.memory = OrderedDict()
+        self.touched = {}
+        self.last_sweep = 0.0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0}
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)"
+        )
+        self.conn.commit()
+        self.total_bytes = self._sum_bytes()
+
+    @staticmethod
+    def make_key(
+        model: str, system_prompt: str, input: str, schema: Type[BaseModel] = None
+    ) -> str:
+        schema_json = schema.model_json_schema() if schema is not None else None
+        payload = json.dumps(
+            [model, system_prompt, input, schema_json], sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _encode(value) -> str:
+        if isinstance(value, BaseModel):
+            return value.model_dump_json()
+        return json.dumps(value)
+
+    @staticmethod
+    def _decode(raw: str, schema: Type[BaseModel] = None):
+        if schema is not None:
+            return schema.model_validate_json(raw)
+        return json.loads(raw)
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _memory_get(self, key: str):
+        """Raw value from the memory tier, None when absent or expired"""
+        entry = self.memory.get(key)
+        if entry is None:
+            return None
+        raw, created_at = entry
+        if self._expired(created_at):
+            del self.memory[key]
+            return None
+        self.memory.move_to_end(key)
+        self.stats["memory_hits"] += 1
+        return raw
+
+    def get(self, key: str, schema: Type[BaseModel] = None) -> Optional[object]:
+        with self.lock:
+            raw = self._memory_get(key)
+            if raw is not None:
+                return self._decode(raw, schema)
+
+            row = self.conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1]):
+                self.stats["misses"] += 1
+                # expired rows are left to the next sweep
+                return None
+
+            raw, created_at = row
+            self.touched[key] = time.time()
+            if len(self.touched) >= self.touch_batch:
+                self._flush_touched()
+                self.conn.commit()
+            self._remember(key, raw, created_at)
+            self.stats["disk_hits"] += 1
+            return self._decode(raw, schema)
+
+    def set(self, key: str, value) -> None:
+        raw = self._encode(value)
+        now = time.time()
+        with self.lock:
+            self._remember(key, raw, now)
+            previous = self.conn.execute(
+                "SELECT size FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                (key, raw, len(raw), now, now),
+            )
+            self.total_bytes += len(raw) - (previous[0] if previous else 0)
+            self.touched.pop(key, None)
+            self._flush_touched()
+            self._evict()
+            self.conn.commit()
+
+    async def aget(self, key: str, schema: Type[BaseModel] = None) -> Optional[object]:
+        """get without blocking the event loop, memory hits skip the thread hop"""
+        with self.lock:
+            raw = self._memory_get(key)
+        if raw is not None:
+            return self._decode(raw, schema)
+        return await asyncio.to_thread(self.get, key, schema)
+
+    async def aset(self, key: str, value) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def record_bypass(self) -> None:
+        with self.lock:
+            self.stats["bypassed"] += 1
+
+    def _remember(self, key: str, raw: str, created_at: float) -> None:
+        self.memory[key] = (raw, created_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _sum_bytes(self) -> int:
+        return self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()[0]
+
+    def _flush_touched(self) -> None:
+        if self.touched:
+            self.conn.executemany(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self.touched.items()],
+            )
+            self.touched.clear()
+
+    def _evict(self) -> None:
+        now = time.time()
+        if self.ttl is not None and now - self.last_sweep >= self.sweep_interval:
+            self.last_sweep = now
+            deleted = self.conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,)
+            ).rowcount
+            if deleted:
+                self.total_bytes = self._sum_bytes()
+        if self.total_bytes <= self.max_bytes:
+            return
+        rows = self.conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at")
+        evicted = []
+        for key, size in rows:
+            if self.total_bytes <= self.max_bytes:
+                break
+            evicted.append((key,))
+            self.memory.pop(key, None)
+            self.total_bytes -= size
+        self.conn.executemany("DELETE FROM llm_cache WHERE key = ?", evicted)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.memory.clear()
+            self.touched.clear()
+            self.conn.execute("DELETE FROM llm_cache")
+            self.conn.commit()
+            self.total_bytes = 0
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            lookups = (
+                self.stats["memory_hits"]
+                + self.stats["disk_hits"]
+                + self.stats["misses"]
+            )
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {
+                **self.stats,
+                "memory_entries": len(self.memory),
+                "disk_bytes": self.total_bytes,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from backend.repository.rulebook_repo import atomic_write
+
+
+class PageCacheRepository:
+    """On-disk cache of fetched pages, keyed by url.
+
+    Each entry keeps the page's markdown together with its ETag and
+    Last-Modified validators, so the next fetch can be a conditional request
+    and a 304 reuses the stored markdown without downloading or converting.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except Exception as e:
+            print(f"Error reading page cache for {url}: {e}")
+            return None
+        return entry if entry.get("url") == url else None
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for a cached page"""
+        entry = self.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def set(self, url: str, markdown: str, etag: str = None, last_modified: str = None):
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+            "markdown": markdown,
+        }
+        try:
+            atomic_write(
+                self._path(url), lambda f: json.dump(entry, f, ensure_ascii=False)
+            )
+        except Exception as e:
+            print(f"Error writing page cache for {url}: {e}")
@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class ResultRepository:
+    """Job-scoped store of pipeline results, kept in memory.
+
+    Only the newest `max_results` jobs are kept. When `persist_dir` is set,
+    `persist` writes a job to `<persist_dir>/<id>.json`; callers schedule it as a
+    background task so the request path never waits on the disk.
+    """
+
+    def __init__(self, max_results: int = 1000, persist_dir: str = None):
+        self.max_results = max_results
+        self.persist_dir = persist_dir
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    def create(self, text: str, data, summary, rows, **meta) -> str:
+        """`meta` (e.g. reused_from, similarity) is kept on the record as is"""
+        job_id = uuid.uuid4().hex
+        record = {
+            "id": job_id,
+            "created_at": time.time(),
+            "text": text,
+            "data": data,
+            "summary": summary,
+            "rows": rows,
+            **meta,
+        }
+        with self.lock:
+            self.results[job_id] = record
+            while len(self.results) > self.max_results:
+                self.results.popitem(last=False)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.results.get(job_id)
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            if not self.results:
+                return None
+            return next(reversed(self.results.values()))
+
+    def persist(self, job_id: str) -> Optional[str]:
+        record = self.get(job_id)
+        if record is None or not self.persist_dir:
+            return None
+        path = os.path.join(self.persist_dir, f"{job_id}.json")
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {**record, "data": record["data"].model_dump()},
+                    f,
+                    indent=2,
+                    ensure_ascii=False,
+                )
+            return path
+        except Exception as e:
+            print(f"Error persisting result {job_id}: {e}")
+            return None
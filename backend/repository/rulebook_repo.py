@@ -1,14 +1,258 @@
+import hashlib
+import json
+import os
+import re
+import secrets
+import stat
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
 import yaml
 
+RULES_DIR = os.path.join(os.path.dirname(__file__), "..", "agents", "rules")
+DEFAULT_DIR = os.path.join(RULES_DIR, "legalbook")
+LEGACY_PATH = os.path.join(RULES_DIR, "legalbook.yaml")
+SNAPSHOT_VERSION = 1
+INDEX_VERSION = 1
 
-class RulebookRepository:
-    def __init__(self, path="backend/agents/rules/legalbook.yaml"):
+
+def atomic_write(path: str, write):
+    """Write through `write(file)` into a temp file, then rename it over `path`,
+    so readers see either the old or the new file, never a partial one"""
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(
+        directory, f".{os.path.basename(path)}.{secrets.token_hex(6)}.tmp"
+    )
+    try:
+        # a rewritten file keeps its permissions
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = None
+    # created like open() would, so the kernel applies the umask to new files
+    fd = os.open(tmp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            if mode is not None:
+                os.fchmod(f.fileno(), mode)
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class RulebookShard:
+    """One jurisdiction's YAML file plus a compiled JSON snapshot of it.
+
+    The snapshot is stamped with the YAML's sha256 and loaded with the C json
+    parser instead of yaml.safe_load whenever it is fresh.
+    """
+
+    def __init__(self, path: str):
         self.path = path
+        self.snapshot_path = os.path.splitext(path)[0] + ".snapshot.json"
+
+    def source_stat(self) -> list:
+        stat = os.stat(self.path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def source_hash(self) -> str:
+        with open(self.path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def _read_snapshot(self):
+        """Snapshot data if it matches the current YAML, else None"""
+        if not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            print(f"Error reading rulebook snapshot: {e}")
+            return None
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return None
+        if snapshot.get("source_stat") == self.source_stat():
+            return snapshot["data"]
+        if snapshot.get("source_sha256") == self.source_hash():
+            return snapshot["data"]
+        return None
+
+    def compile_snapshot(self, data=None):
+        """Write the JSON snapshot of the YAML (parsing it unless data is given)"""
+        if data is None:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f)
+        # round trip so dates etc. come back exactly as the snapshot will give them
+        data = json.loads(json.dumps(data, ensure_ascii=False, default=str))
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "source_sha256": self.source_hash(),
+            "source_stat": self.source_stat(),
+            "data": data,
+        }
+        try:
+            atomic_write(
+                self.snapshot_path, lambda f: json.dump(snapshot, f, ensure_ascii=False)
+            )
+        except Exception as e:
+            print(f"Error writing rulebook snapshot: {e}")
+        return data
+
+    def load(self):
+        data = self._read_snapshot()
+        if data is None:
+            data = self.compile_snapshot()
+        return data
+
+    def save(self, data):
+        atomic_write(
+            self.path,
+            lambda f: yaml.dump(data, f, allow_unicode=True, sort_keys=False),
+        )
+        self.compile_snapshot()
+
+
+class RulebookRepository:
+    """The rulebook, sharded into one YAML file per jurisdiction.
+
+    `index.json` lists the jurisdictions and their shard files. Shards are only
+    parsed when a caller asks for their region and the parsed ones are kept in
+    an LRU of `cache_size` entries, so memory and load time follow the regions
+    in use rather than the size of the whole rulebook. Parsed shards are shared
+    and must be treated as read-only. Every write replaces a single shard (and
+    the index) atomically.
+
+    A legacy single-file legalbook.yaml is split into shards on first use.
+    """
+
+    def __init__(self, directory=DEFAULT_DIR, cache_size: int = 16):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.cache_size = cache_size
+        self.shards = OrderedDict()
+        self.index = None
+        self.index_stat = None
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def shard_file(region: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_-]", "_", region) + ".yaml"
+
+    def _load_index(self) -> dict:
+        if not os.path.exists(self.index_path):
+            self._migrate()
+        if not os.path.exists(self.index_path):
+            return {"version": INDEX_VERSION, "regions": {}}
+        stat = os.stat(self.index_path)
+        stat = (stat.st_mtime_ns, stat.st_size)
+        if self.index is None or self.index_stat != stat:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+            self.index_stat = stat
+        return self.index
+
+    def _save_index(self, index: dict):
+        atomic_write(
+            self.index_path,
+            lambda f: json.dump(index, f, indent=2, ensure_ascii=False, sort_keys=True),
+        )
+        self.index = index
+        stat = os.stat(self.index_path)
+        self.index_stat = (stat.st_mtime_ns, stat.st_size)
+
+    def _migrate(self):
+        """Split a legacy legalbook.yaml into shards"""
+        if not os.path.exists(LEGACY_PATH):
+            return
+        print(f"Splitting {LEGACY_PATH} into per-jurisdiction shards")
+        with open(LEGACY_PATH, "r", encoding="utf-8") as f:
+            legacy = yaml.safe_load(f) or {}
+        self.save_rulebook(legacy)
+
+    def regions(self) -> List[str]:
+        """Jurisdiction codes present in the rulebook"""
+        with self.lock:
+            return list(self._load_index()["regions"])
+
+    def load_region(self, region: str) -> Optional[dict]:
+        """Parsed shard of one jurisdiction, None when the rulebook has none"""
+        with self.lock:
+            entry = self._load_index()["regions"].get(region)
+            if entry is None:
+                return None
+            shard = RulebookShard(os.path.join(self.directory, entry["file"]))
+            try:
+                stat = shard.source_stat()
+            except FileNotFoundError:
+                print(f"Missing rulebook shard for {region}: {shard.path}")
+                return None
+            cached = self.shards.get(region)
+            if cached is not None and cached[0] == stat:
+                self.shards.move_to_end(region)
+                return cached[1]
+            data = shard.load()
+            self.shards[region] = (stat, data)
+            while len(self.shards) > self.cache_size:
+                self.shards.popitem(last=False)
+            return data
+
+    def load_regions(self, regions: List[str]) -> Dict[str, dict]:
+        """Shards of the given regions that exist, in the given order"""
+        books = {}
+        for region in regions:
+            if region and region not in books:
+                book = self.load_region(region)
+                if book is not None:
+                    books[region] = book
+        return books
+
+    def load_rulebook(self) -> dict:
+        """The whole rulebook as {"geo": {region: book}}, for tools and rebuilds"""
+        return {"geo": self.load_regions(self.regions())}
+
+    def save_region(self, region: str, data: dict):
+        """Replace one jurisdiction's shard and its index entry"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            index = json.loads(json.dumps(self._load_index()))
+            entry = {"file": self.shard_file(region)}
+            shard = RulebookShard(os.path.join(self.directory, entry["file"]))
+            shard.save(data)
+            source = (data or {}).get("source") or {}
+            entry["title"] = source.get("title")
+            entry["sha256"] = shard.source_hash()
+            index["regions"][region] = entry
+            self._save_index(index)
+            self.shards.pop(region, None)
+
+    def save_rulebook(self, data: dict):
+        """Save every jurisdiction of a {"geo": {...}} tree, unchanged shards are skipped"""
+        os.makedirs(self.directory, exist_ok=True)
+        if not os.path.exists(self.index_path):
+            self._save_index({"version": INDEX_VERSION, "regions": {}})
+        for region, book in (data.get("geo") or {}).items():
+            if self.load_region(region) == json.loads(
+                json.dumps(book, ensure_ascii=False, default=str)
+            ):
+                continue
+            self.save_region(region, book)
 
-    def load_rulebook(self):
-        with open(self.path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+    def load_manifest(self) -> dict:
+        """Content hash and jurisdiction of every source the rulebook was built from"""
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
 
-    def save_rulebook(self, data):
-        with open(self.path, "w", encoding="utf-8") as f:
-            yaml.dump(data, f, allow_unicode=True, sort_keys=False)
+    def save_manifest(self, manifest: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write(
+            self.manifest_path,
+            lambda f: json.dump(manifest, f, indent=2, ensure_ascii=False),
+        )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class IntakeOutput(BaseModel):
@@ -17,3 +17,8 @@ class AnalzyerOutput(BaseModel):
     evidence: str
     recommendations: str
     legal_references: str
+
+
+class BatchAnalyzeRequest(BaseModel):
+    features: List[str]
+    concurrency: Optional[int] = None
@@ -0,0 +1,81 @@
+"""Micro-benchmark of IntakeAgent terminology normalization vs glossary size.
+
+Usage: python -m backend.scripts.bench_normalization [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import string
+import time
+
+from backend.util.terminology import TerminologyNormalizer
+
+MAPPING_PATH = os.path.join(os.path.dirname(__file__), "..", "util", "mapping.json")
+SAMPLE_TEXT = (
+    "Curfew login blocker with ASL and GH for Utah minors. To comply with the Utah "
+    "Social Media Regulation Act, we are implementing a curfew-based login "
+    "restriction for users under 18. The system uses ASL to detect minor accounts "
+    "and routes enforcement through GH to apply only within Utah boundaries. The "
+    "feature activates during restricted night hours and logs activity using "
+    "EchoTrace for auditability, operating in ShadowMode during initial rollout "
+    "while PF stays NR for teens and T5 data is never shared under NSP."
+)
+
+
+def legacy_normalization(terminology: dict, input_text: str) -> str:
+    """The previous per-term loop, kept here as the baseline"""
+    for term in sorted(terminology.keys(), key=len, reverse=True):
+        pattern = re.compile(r"\b" + re.escape(term) + r"\b", re.IGNORECASE)
+        replacement = f"{term} ({terminology[term]})"
+        input_text = pattern.sub(replacement, input_text)
+    return input_text
+
+
+def build_glossary(base: dict, size: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    glossary = dict(base)
+    while len(glossary) < size:
+        length = rng.randint(2, 8)
+        term = "".join(rng.choices(string.ascii_uppercase + string.digits, k=length))
+        glossary.setdefault(term, f"Synthetic abbreviation {term}")
+    return glossary
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 2000, 5000])
+    args = parser.parse_args()
+
+    with open(MAPPING_PATH, "r", encoding="utf-8") as f:
+        base = json.load(f)["terminology"]
+
+    print(
+        f"{'terms':>7} {'legacy ms':>10} {'build ms':>9} {'single ms':>10} {'speedup':>8}"
+    )
+    for size in args.sizes:
+        glossary = build_glossary(base, size)
+        legacy_ms = timed(
+            lambda: legacy_normalization(glossary, SAMPLE_TEXT), args.repeat
+        )
+        build_ms = timed(lambda: TerminologyNormalizer(glossary), 1)
+        normalizer = TerminologyNormalizer(glossary)
+        single_ms = timed(lambda: normalizer.normalize(SAMPLE_TEXT), args.repeat)
+        print(
+            f"{size:>7} {legacy_ms:>10.3f} {build_ms:>9.3f} {single_ms:>10.3f} "
+            f"{legacy_ms / single_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""End-to-end pipeline benchmark against a local fake Gemini backend.
+
+Runs the dataset features through the agents directly (with per-stage timing)
+and through the /analyze endpoint, at each requested concurrency, with every
+model call answered by scripts.fake_gemini after a deterministic delay. The
+LLM response cache and the near-duplicate reuse are disabled so every run does
+the same work, and so is the scheduler's rate limit unless LLM_RATE_PER_MINUTE
+is set.
+
+Reports p50/p95/p99 latency, throughput and per-stage time; use --json (or
+--output report.json) for machine-readable results.
+
+Usage: python -m backend.scripts.bench_pipeline [--concurrency 1 4 16]
+       [--requests 60] [--latency-ms 200] [--jitter-ms 50] [--mode agents http]
+       [--json] [--output report.json]
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["RESULT_PERSIST_DIR"] = ""
+os.environ.setdefault("LLM_RATE_PER_MINUTE", "0")
+os.environ.setdefault("SIMILARITY_ENABLED", "false")
+os.environ.setdefault(
+    "HISTORY_PATH", os.path.join(tempfile.gettempdir(), "bench_history.sqlite3")
+)
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import contextlib  # noqa: E402
+import io  # noqa: E402
+import json  # noqa: E402
+import statistics  # noqa: E402
+import time  # noqa: E402
+from collections import defaultdict  # noqa: E402
+
+from backend.scripts.fake_gemini import install  # noqa: E402
+from backend.util.dependencies import getExcelService, getPipeline  # noqa: E402
+
+STAGES = ("normalize", "intake", "analyzer", "summary")
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def describe(values: list) -> dict:
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "mean": statistics.fmean(values) if values else 0.0,
+    }
+
+
+async def run_agents(texts: list, concurrency: int) -> tuple:
+    """Drive the pipeline stages directly, returns (latencies, stage times, errors)"""
+    pipeline = getPipeline()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, stages, errors = [], defaultdict(list), 0
+
+    async def one(text: str):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            timings = {}
+            try:
+                mark = time.perf_counter()
+                cleaned = pipeline.intake_agent.normalization(text)
+                timings["normalize"] = time.perf_counter() - mark
+
+                mark = time.perf_counter()
+                region = await pipeline.intake_agent.extract_region(cleaned)
+                timings["intake"] = time.perf_counter() - mark
+                if region is None:
+                    raise ValueError("Failed to extract region")
+
+                mark = time.perf_counter()
+                result = await pipeline.analyzer_agent.analyze_question(cleaned, region)
+                timings["analyzer"] = time.perf_counter() - mark
+
+                mark = time.perf_counter()
+                await pipeline._store(text, result)
+                timings["summary"] = time.perf_counter() - mark
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+            for stage, seconds in timings.items():
+                stages[stage].append(seconds)
+
+    await asyncio.gather(*(one(text) for text in texts))
+    return latencies, stages, errors
+
+
+async def run_http(texts: list, concurrency: int) -> tuple:
+    """Drive GET /analyze in-process over ASGI, returns (latencies, {}, errors)"""
+    import httpx
+
+    from backend.main import app
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+
+        async def one(text: str):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await c.get("/analyze", params={"text": text}, timeout=None)
+                if response.status_code != 200:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one(text) for text in texts))
+    return latencies, {}, errors
+
+
+async def bench(args) -> dict:
+    client = install(args.latency_ms / 1000, args.jitter_ms / 1000)
+    features = getExcelService().get_contents()
+    texts = [features[i % len(features)] for i in range(args.requests)]
+    runners = {"agents": run_agents, "http": run_http}
+
+    results = []
+    for mode in args.mode:
+        for concurrency in args.concurrency:
+            calls_before = client.calls
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies, stages, errors = await runners[mode](texts, concurrency)
+            wall = time.perf_counter() - start
+            results.append(
+                {
+                    "mode": mode,
+                    "concurrency": concurrency,
+                    "requests": len(texts),
+                    "errors": errors,
+                    "wall_s": wall,
+                    "throughput_rps": len(latencies) / wall if wall else 0.0,
+                    "llm_calls": client.calls - calls_before,
+                    "latency_s": describe(latencies),
+                    "stages_s": {
+                        stage: describe(stages[stage])
+                        for stage in STAGES
+                        if stage in stages
+                    },
+                }
+            )
+    return {
+        "config": {
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+
+
+def print_table(report: dict):
+    print(
+        f"{'mode':>6} {'conc':>5} {'ok':>5} {'rps':>8} {'p50':>8} {'p95':>8} "
+        f"{'p99':>8}  stages (p50)"
+    )
+    for r in report["results"]:
+        latency = r["latency_s"]
+        stages = " ".join(
+            f"{stage}={stats['p50'] * 1000:.1f}ms"
+            for stage, stats in r["stages_s"].items()
+        )
+        print(
+            f"{r['mode']:>6} {r['concurrency']:>5} {r['requests'] - r['errors']:>5} "
+            f"{r['throughput_rps']:>8.2f} {latency['p50']:>8.3f} "
+            f"{latency['p95']:>8.3f} {latency['p99']:>8.3f}  {stages}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument(
+        "--mode", nargs="+", choices=["agents", "http"], default=["agents", "http"]
+    )
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(bench(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(report)
+
+
+if __name__ == "__main__":
+    main()
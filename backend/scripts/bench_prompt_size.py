@@ -0,0 +1,67 @@
+"""Reports how much rulebook context the BM25 retrieval and the compact
+rendering remove from analyzer prompts.
+
+For every feature in the dataset and every jurisdiction in the rulebook it
+compares the whole jurisdiction subtree (previous behaviour) with the top-k
+entries retrieved for that feature, as a dict repr (top-k) and as rendered by
+ContextRenderer (compact).
+
+Usage: python -m backend.scripts.bench_prompt_size [--top-k 6] [--budget 1500]
+       [--evidence none|short]
+"""
+
+import argparse
+import os
+
+import pandas as pd
+
+from backend.repository.rulebook_repo import RulebookRepository
+from backend.service.retrieval_service import RulebookIndex, estimate_tokens
+from backend.service.context_renderer import ContextRenderer
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+DATASET_PATH = os.path.join(BACKEND_DIR, "dataset", "dataset.xlsx")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top-k", type=int, default=6)
+    parser.add_argument("--budget", type=int, default=1500)
+    parser.add_argument("--evidence", choices=["none", "short"], default="none")
+    args = parser.parse_args()
+
+    geo = RulebookRepository().load_rulebook()["geo"]
+    index = RulebookIndex(geo)
+    df = pd.read_excel(DATASET_PATH)
+    features = [".".join(map(str, row)) for row in df.iloc[:, :2].values.tolist()]
+
+    renderer = ContextRenderer(evidence=args.evidence)
+    print(
+        f"{'region':>8} {'full tok':>9} {'top-k tok':>10} {'compact tok':>12} "
+        f"{'reduction':>10}"
+    )
+    total_full = total_used = total_compact = 0
+    for region in geo:
+        full = estimate_tokens(str(geo[region]))
+        used = compact = 0
+        for f in features:
+            context = index.search(f, [region], args.top_k, args.budget)
+            _, stats = renderer.render(context)
+            used += stats["tokens_before"]
+            compact += stats["tokens_after"]
+        used, compact = used / len(features), compact / len(features)
+        total_full += full
+        total_used += used
+        total_compact += compact
+        print(
+            f"{region:>8} {full:>9} {used:>10.0f} {compact:>12.0f} "
+            f"{1 - compact / full:>9.0%}"
+        )
+    print(
+        f"{'total':>8} {total_full:>9} {total_used:>10.0f} {total_compact:>12.0f} "
+        f"{1 - total_compact / total_full:>9.0%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
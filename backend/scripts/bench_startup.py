@@ -0,0 +1,71 @@
+"""Cold-start benchmark: time to import backend.main and to build the pipeline.
+
+Every sample runs in a fresh interpreter so module caches do not leak between
+runs. Prints a table, or JSON with --json so results can be tracked over time.
+
+Usage: python -m backend.scripts.bench_startup [--runs 5] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+PROBE = """
+import json, time
+start = time.perf_counter()
+import backend.main
+imported = time.perf_counter()
+from backend.util.dependencies import getPipeline
+getPipeline()
+built = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "first_use_s": built - imported}))
+"""
+
+
+def sample() -> dict:
+    env = {**os.environ, "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY") or "bench"}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.runs)]
+    report = {
+        key: {
+            "median": statistics.median(s[key] for s in samples),
+            "min": min(s[key] for s in samples),
+            "max": max(s[key] for s in samples),
+        }
+        for key in ("import_s", "first_use_s")
+    }
+    report["runs"] = args.runs
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for key in ("import_s", "first_use_s"):
+        stats = report[key]
+        print(
+            f"{key:>12}: median {stats['median']:.3f}s "
+            f"(min {stats['min']:.3f}s, max {stats['max']:.3f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Offline bulk screening of a feature inventory (.xlsx, .csv or .parquet).
+
+Every row goes through normalization, intake, analysis and summary with up to
+--concurrency rows in flight. Each finished row is appended to a JSONL
+checkpoint, so an interrupted run picks up where it stopped: rows already
+analysed successfully are skipped, failed rows are tried again. When the run
+ends the checkpoint is written out as a columnar file (Parquet when pyarrow is
+installed, CSV otherwise).
+
+Usage: python -m backend.scripts.bulk_screen [--input dataset.xlsx]
+       [--output screening.parquet] [--concurrency 5] [--llm-summary] [--restart]
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import time
+
+from backend.schema.schemas import AnalzyerOutput
+from backend.util.config import getConfig
+from backend.util.dependencies import getExcelService, getPipeline
+
+OUTPUTS_DIR = os.path.join(os.path.dirname(__file__), "..", "agents", "outputs")
+COLUMNS = (
+    ["index", "row_key", "text", "status", "error", "result_id"]
+    + list(AnalzyerOutput.model_fields)
+    + ["geo_compliance_flag", "reused_from", "similarity"]
+)
+
+
+def row_key(index: int, text: str) -> str:
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+    return f"{index}:{digest}"
+
+
+def load_checkpoint(path: str) -> dict:
+    """Latest checkpoint record of every row, by row key"""
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # the last line may be cut short by an interrupted run
+                continue
+            records[record["row_key"]] = record
+    return records
+
+
+class Checkpoint:
+    """Append-only JSONL log, flushed to disk after every row"""
+
+    def __init__(self, path: str):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: dict):
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+class Progress:
+    def __init__(self, skipped: int):
+        self.start = time.perf_counter()
+        self.skipped = skipped
+        self.done = 0
+        self.failed = 0
+
+    def update(self, ok: bool):
+        self.done += 1
+        self.failed += 0 if ok else 1
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed else 0.0
+        print(
+            f"[{self.done} screened, {self.failed} failed, {self.skipped} resumed] "
+            f"{rate:.2f} rows/s, {elapsed:.0f}s elapsed",
+            flush=True,
+        )
+
+
+async def screen_row(pipeline, index: int, text: str, llm_summary: bool) -> dict:
+    record = {"index": index, "row_key": row_key(index, text), "text": text}
+    try:
+        result = await pipeline.analyze(text, llm_summary)
+    except Exception as e:
+        return {**record, "status": "error", "error": str(e)}
+    summary = result["summary"][0] if result["summary"] else {}
+    return {
+        **record,
+        "status": "success",
+        "result_id": result["id"],
+        **result["data"].model_dump(),
+        "geo_compliance_flag": summary.get("geo_compliance_flag"),
+        "reused_from": result.get("reused_from"),
+        "similarity": result.get("similarity"),
+    }
+
+
+async def screen(args) -> str:
+    checkpoint_path = args.output + ".checkpoint.jsonl"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    finished = {
+        key
+        for key, record in load_checkpoint(checkpoint_path).items()
+        if record["status"] == "success"
+    }
+
+    pipeline = getPipeline()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    checkpoint = Checkpoint(checkpoint_path)
+    progress = Progress(len(finished))
+
+    async def one(index: int, text: str):
+        async with semaphore:
+            record = await screen_row(pipeline, index, text, args.llm_summary)
+        checkpoint.write(record)
+        progress.update(record["status"] == "success")
+
+    try:
+        index = 0
+        for chunk in getExcelService().iter_contents(args.input, args.chunk_size):
+            pending = []
+            for text in chunk:
+                if row_key(index, text) not in finished:
+                    pending.append(one(index, text))
+                index += 1
+            await asyncio.gather(*pending)
+    finally:
+        checkpoint.close()
+
+    write_output(load_checkpoint(checkpoint_path), args.output)
+    print(
+        f"Screened {progress.done} rows ({progress.failed} failed, "
+        f"{progress.skipped} resumed) -> {args.output}"
+    )
+    return args.output
+
+
+def write_output(records: dict, path: str):
+    rows = sorted(records.values(), key=lambda record: record["index"])
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table(
+            {column: [row.get(column) for row in rows] for column in COLUMNS}
+        )
+        pq.write_table(table, path)
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def default_output() -> str:
+    try:
+        import pyarrow  # noqa: F401
+
+        extension = "parquet"
+    except ImportError:
+        extension = "csv"
+    return os.path.join(OUTPUTS_DIR, f"screening.{extension}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--input", help="Feature inventory, defaults to the dataset")
+    parser.add_argument("--output", default=default_output())
+    parser.add_argument(
+        "--concurrency", type=int, default=getConfig().BATCH_CONCURRENCY
+    )
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--llm-summary", action="store_true")
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore the checkpoint, start over"
+    )
+    args = parser.parse_args()
+
+    if args.output.endswith(".parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("writing .parquet needs pyarrow, use a .csv output instead")
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    asyncio.run(screen(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,112 @@
+from backend.agents.legal_agent import is_missing
+from backend.service.jurisdiction_service import canonical_jurisdiction, load_mapping
 from backend.util.links import links
-from backend.main import LegalAgentMain, RuleBook, CrawlerMain
+from backend.util.dependencies import getCrawler, getLegalAgent, getRuleBook
 from backend.agents.analyzer_agent import AnalyzerAgent
+from backend.util.config import getConfig
 import asyncio
+import hashlib
 import yaml
 
 
-async def process_legal_sources():
-    merged = {"geo": {}}
-
-    for source, url in links.items():
-        print(f"Processing {source}: {url} ...")
-        markdown = await CrawlerMain.url_to_markdown(url)
-        if not markdown:
-            print(f"Failed to get markdown for {url}")
-            continue
-        yaml_str = LegalAgentMain.extract_legals(markdown)
-
-        try:
-            data = yaml.safe_load(yaml_str)
-        except Exception as e:
-            print(f"YAML parse error for {url}: {e}")
-            continue
-
-        region_name = data.get("source", {}).get("jurisdiction")
-        if not region_name:
-            print(f"No jurisdiction found for {url}")
-            continue
-
-        if region_name not in merged["geo"]:
-            merged["geo"][region_name] = {}
-
-        for key, value in data.items():
-            merged["geo"][region_name][key] = value
+async def extract_source(source: str, url: str, manifest: dict, force: bool):
+    """Crawl one source and extract it, returns None when the page is unchanged"""
+    print(f"Processing {source}: {url} ...")
+    markdown = await getCrawler().url_to_markdown(url)
+    if not markdown:
+        print(f"Failed to get markdown for {url}")
+        return None
+
+    content_hash = hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+    previous = manifest.get(source, {})
+    if (
+        not force
+        and previous.get("url") == url
+        and previous.get("hash") == content_hash
+    ):
+        print(f"Unchanged, skipping extraction: {source}")
+        return None
+
+    yaml_str = await getLegalAgent().extract_legals(markdown)
+    try:
+        data = yaml.safe_load(yaml_str)
+    except Exception as e:
+        print(f"YAML parse error for {url}: {e}")
+        return None
+
+    if not isinstance(data, dict):
+        print(f"Extraction for {url} is not a YAML mapping")
+        return None
+
+    region_name = (data.get("source") or {}).get("jurisdiction")
+    if is_missing(region_name):
+        print(f"No jurisdiction found for {url}")
+        return None
+
+    # stored under the code the resolver gives, e.g. "FL" -> "US-FL"
+    region_name = canonical_jurisdiction(region_name, load_mapping())
+    data["source"]["jurisdiction"] = region_name
+    return {"url": url, "hash": content_hash, "jurisdiction": region_name, "data": data}
+
+
+async def process_legal_sources(force: bool = False):
+    """Rebuild the rulebook shards, only re-extracting sources whose page changed"""
+    rulebook = getRuleBook()
+    manifest = {} if force else rulebook.load_manifest()
+    merged = {"geo": {}} if force else rulebook.load_rulebook()
+
+    semaphore = asyncio.Semaphore(getConfig().CRAWL_CONCURRENCY)
+
+    failed = []
+
+    async def worker(source, url):
+        # one failing source must not throw away the others' extractions
+        async with semaphore:
+            try:
+                return await extract_source(source, url, manifest, force)
+            except Exception as e:
+                print(f"Failed to process {source} ({url}): {e}")
+                failed.append(source)
+                return None
+
+    async with getCrawler():
+        results = await asyncio.gather(
+            *(worker(source, url) for source, url in links.items())
+        )
 
-    RuleBook.save_rulebook(merged)
-    print("Saved segregated YAML")
+    changed = {}
+    for source, result in zip(links, results):
+        if result is not None:
+            changed[source] = result
+
+    if failed:
+        print(f"Failed sources, kept as they were: {sorted(failed)}")
+    if not changed:
+        if not failed:
+            print("All sources unchanged, the rulebook is up to date")
+        return
+
+    # only the jurisdictions of changed sources are re-merged and rewritten,
+    # on a copy since loaded shards are shared
+    updated = {}
+    for source, result in changed.items():
+        jurisdiction = result["jurisdiction"]
+        if jurisdiction not in updated:
+            updated[jurisdiction] = dict(merged["geo"].get(jurisdiction) or {})
+        for key, value in result["data"].items():
+            updated[jurisdiction][key] = value
+        manifest[source] = {
+            "url": result["url"],
+            "hash": result["hash"],
+            "jurisdiction": jurisdiction,
+        }
+
+    for jurisdiction, book in updated.items():
+        rulebook.save_region(jurisdiction, book)
+    rulebook.save_manifest(manifest)
+    print(
+        f"Saved segregated YAML, updated: {sorted({r['jurisdiction'] for r in changed.values()})}"
+    )
 
 
 async def analyze_user_question(question: str, jurisdiction: str = None):
@@ -49,7 +121,7 @@ async def main():
     import sys
 
     if len(sys.argv) > 1 and sys.argv[1] == "--create":
-        await process_legal_sources()
+        await process_legal_sources(force="--force" in sys.argv)
     else:
         question = input("Enter your legal question: ").strip()
         jurisdiction = (
@@ -0,0 +1,138 @@
+"""Deterministic local stand-in for the Gemini chat client, used by the benchmarks.
+
+FakeGemini plugs into the same place as ChatGoogleGenerativeAI (BaseAgent's
+shared client) and answers with canned responses after a configurable delay,
+so the pipeline can be measured without an API key or network access. The
+delay of every call is derived from a hash of its input, so two runs with the
+same settings see the same latencies.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, AsyncIterator, Iterator, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from backend.schema.schemas import AnalzyerOutput, IntakeOutput
+
+CANNED = {
+    IntakeOutput: {"country": "US", "continent": "NA", "states": "CA"},
+    AnalzyerOutput: {
+        "geolocation": "US-CA",
+        "law": "California Consumer Privacy Act",
+        "severity": "Medium",
+        "reasoning": "The feature processes personal data of minors in California.",
+        "potential_violations": "Missing opt-in consent for users under 16.",
+        "evidence": "Feature description mentions age-based personalisation.",
+        "recommendations": "Add an age gate and parental consent flow.",
+        "legal_references": "CCPA 1798.120(c)",
+    },
+}
+
+
+class FakeGemini(BaseChatModel):
+    """Chat model answering with canned outputs after `latency` (+/- `jitter`) seconds"""
+
+    latency: float = 0.2
+    jitter: float = 0.05
+    stream_chunks: int = 8
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gemini"
+
+    def delay(self, payload: Any) -> float:
+        digest = hashlib.sha1(str(payload).encode("utf-8")).digest()
+        spread = int.from_bytes(digest[:4], "big") / 2**32 * 2 - 1
+        return max(0.0, self.latency + spread * self.jitter)
+
+    def text(self) -> str:
+        return json.dumps(CANNED[AnalzyerOutput])
+
+    def usage(self, payload: Any, output: str) -> dict:
+        input_tokens, output_tokens = len(str(payload)) // 4, len(output) // 4
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def message(self, payload: Any, content: str) -> AIMessage:
+        return AIMessage(content=content, usage_metadata=self.usage(payload, content))
+
+    def _generate(
+        self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        self.calls += 1
+        time.sleep(self.delay(messages))
+        message = self.message(messages, self.text())
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        self.calls += 1
+        await asyncio.sleep(self.delay(messages))
+        message = self.message(messages, self.text())
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs
+    ) -> Iterator[ChatGenerationChunk]:
+        self.calls += 1
+        step = self.delay(messages) / self.stream_chunks
+        for part in self._parts():
+            time.sleep(step)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=part))
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        step = self.delay(messages) / self.stream_chunks
+        for part in self._parts():
+            await asyncio.sleep(step)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=part))
+
+    def _parts(self) -> List[str]:
+        text = self.text()
+        size = -(-len(text) // self.stream_chunks)
+        return [text[i : i + size] for i in range(0, len(text), size)]
+
+    def with_structured_output(self, schema, include_raw: bool = False, **kwargs):
+        """Returns the canned instance of `schema` instead of calling tools"""
+
+        def result(prompt_value):
+            parsed = schema.model_validate(CANNED[schema])
+            if not include_raw:
+                return parsed
+            raw = self.message(prompt_value, json.dumps(CANNED[schema]))
+            return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+        def answer(prompt_value):
+            self.calls += 1
+            time.sleep(self.delay(prompt_value))
+            return result(prompt_value)
+
+        async def aanswer(prompt_value):
+            self.calls += 1
+            await asyncio.sleep(self.delay(prompt_value))
+            return result(prompt_value)
+
+        return RunnableLambda(answer, afunc=aanswer)
+
+
+def install(latency: float = 0.2, jitter: float = 0.05) -> FakeGemini:
+    """Make every agent use a FakeGemini client, returns it for call counting"""
+    from backend.agents.base_agent import BaseAgent
+
+    client = FakeGemini(latency=latency, jitter=jitter)
+    BaseAgent._client = client
+    BaseAgent._chains = {}
+    return client
@@ -0,0 +1,163 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+from backend.service.retrieval_service import estimate_tokens
+
+SECTION_ORDER = [
+    "definitions",
+    "obligations",
+    "prohibitions",
+    "disclosures_reporting",
+    "enforcement",
+    "severability",
+    "notes",
+]
+DROPPED_FIELDS = {"anchor", "evidence"}
+SOURCE_FIELDS = ["citation_or_id", "document_type", "effective_date", "version_note"]
+
+CITATION_RE = re.compile(r"\[\[[^\]]*\]\]\([^)]*\)")
+LINK_RE = re.compile(r"\[([^\]]*)\]\((?:[^()]|\([^)]*\))*\)")
+URL_RE = re.compile(r"https?://\S+")
+EMPHASIS_RE = re.compile(r"(\*\*|__)(.+?)\1")
+SPACE_RE = re.compile(r"\s+")
+
+
+def clean_text(text: str) -> str:
+    """Plain text of a markdown snippet: links become their label, citations,
+    bare URLs and emphasis markers are dropped"""
+    text = CITATION_RE.sub("", text)
+    text = LINK_RE.sub(r"\1", text)
+    text = URL_RE.sub("", text)
+    text = EMPHASIS_RE.sub(r"\2", text)
+    text = text.replace("\\(", "(").replace("\\)", ")")
+    return SPACE_RE.sub(" ", text).strip()
+
+
+def abbreviate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[: max_chars - 3].rsplit(" ", 1)[0] + "..."
+
+
+class ContextRenderer:
+    """Renders rulebook context for the analyzer prompt as compact, stable text.
+
+    Null and empty fields, `anchor` and `evidence` are left out (with
+    evidence="short" the first quote is kept, link-free and abbreviated), and
+    an entry already rendered for another jurisdiction is not repeated.
+    Sections and fields always come out in the same order, so identical
+    context gives an identical prompt.
+    """
+
+    def __init__(self, evidence: str = "none", evidence_chars: int = 160):
+        self.evidence = evidence
+        self.evidence_chars = evidence_chars
+
+    def render(self, context: Dict[str, Any]) -> Tuple[str, Dict[str, int]]:
+        """(text, stats) where stats compares the text with the dict repr"""
+        books = self._books(context)
+        seen = set()
+        duplicates = 0
+        blocks = []
+        for region, book in books.items():
+            lines = [self._header(region, book.get("source"))]
+            for section in self._sections(book):
+                items = book[section]
+                if not isinstance(items, list):
+                    items = [items]
+                rendered = []
+                for item in items:
+                    line = self._item(item)
+                    if not line:
+                        continue
+                    key = (section, line.lower())
+                    if key in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(key)
+                    rendered.append(f"- {line}")
+                if rendered:
+                    lines.append(f"{section}:")
+                    lines.extend(rendered)
+            blocks.append("\n".join(lines))
+        text = "\n\n".join(blocks)
+
+        before = str(context)
+        stats = {
+            "chars_before": len(before),
+            "chars_after": len(text),
+            "tokens_before": estimate_tokens(before),
+            "tokens_after": estimate_tokens(text),
+            "duplicates_dropped": duplicates,
+        }
+        return text, stats
+
+    @staticmethod
+    def _books(context: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Per-region books; a single merged book (no region keys) is one book"""
+        if not context:
+            return {}
+        if any(section in context for section in ["source"] + SECTION_ORDER):
+            return {"": context}
+        return {region: book or {} for region, book in context.items()}
+
+    @staticmethod
+    def _sections(book: Dict[str, Any]) -> List[str]:
+        known = [s for s in SECTION_ORDER if s in book]
+        others = sorted(s for s in book if s not in SECTION_ORDER and s != "source")
+        return known + others
+
+    def _header(self, region: str, source) -> str:
+        source = source or {}
+        title = clean_text(str(source.get("title") or ""))
+        details = ", ".join(
+            clean_text(str(source[field]))
+            for field in SOURCE_FIELDS
+            if source.get(field) not in (None, "", [])
+        )
+        header = f"## {region}" if region else "##"
+        if title:
+            header += f" | {title}"
+        if details:
+            header += f" ({details})"
+        return header
+
+    def _value(self, value, nested: bool = False) -> str:
+        if isinstance(value, dict):
+            parts = [
+                f"{k}={self._value(v, True)}"
+                for k, v in value.items()
+                if k not in DROPPED_FIELDS and v not in (None, "", [], {})
+            ]
+            text = "; ".join(p for p in parts if not p.endswith("="))
+            return f"({text})" if nested and text else text
+        if isinstance(value, list):
+            return ", ".join(self._value(v, True) for v in value if v not in (None, ""))
+        if isinstance(value, bool):
+            return "yes" if value else "no"
+        return clean_text(str(value))
+
+    def _item(self, item) -> str:
+        if not isinstance(item, dict):
+            return self._value(item) if item not in (None, "", []) else ""
+        if "term" in item and "text" in item:
+            line = f"{self._value(item['term'])}: {self._value(item['text'])}"
+        else:
+            line = self._value(item)
+        if self.evidence == "short":
+            quote = self._quote(item)
+            if quote:
+                line += f' | "{quote}"'
+        return line
+
+    def _quote(self, item: Dict[str, Any]) -> str:
+        evidence = item.get("evidence") or []
+        if isinstance(evidence, dict):
+            evidence = [evidence]
+        for entry in evidence:
+            quote = entry.get("quote") if isinstance(entry, dict) else entry
+            if quote:
+                quote = abbreviate(clean_text(str(quote)), self.evidence_chars)
+                anchor = entry.get("anchor") if isinstance(entry, dict) else None
+                return f"{quote} [{anchor}]" if anchor else quote
+        return ""
@@ -1,17 +1,168 @@
-from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
-from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+import asyncio
+import re
+
+import httpx
+
+from backend.repository.page_cache_repo import PageCacheRepository
+
+USER_AGENT = "Mozilla/5.0 (compatible; TTJ-legal-crawler/1.0)"
+CONTENT_SELECTORS = ["main", "article", "#mw-content-text", "#content", "body"]
+DROPPED_TAGS = [
+    "script",
+    "style",
+    "noscript",
+    "nav",
+    "header",
+    "footer",
+    "aside",
+    "form",
+]
+RENDER_HINTS = re.compile(
+    r"enable javascript|requires javascript|<div id=\"(root|app|__next)\">\s*</div>",
+    re.IGNORECASE,
+)
+
+
+def html_to_markdown(html: str) -> str:
+    """Markdown of the page's main content, without scripts and navigation"""
+    from bs4 import BeautifulSoup
+    from markdownify import markdownify
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(DROPPED_TAGS):
+        tag.decompose()
+    content = next(
+        (node for node in map(soup.select_one, CONTENT_SELECTORS) if node), soup
+    )
+    markdown = markdownify(str(content), heading_style="ATX")
+    return re.sub(r"\n{3,}", "\n\n", markdown).strip()
 
 
 class CrawlerService:
+    """Fetches pages as markdown.
+
+    Static pages are fetched with a pooled HTTP client and converted locally;
+    the crawl4ai headless browser is only started for pages that come back
+    empty or ask for JavaScript. Static fetches go through an on-disk page
+    cache (when `cache_dir` is set) that revalidates with ETag/Last-Modified.
+
+    Use it as an async context manager to share one HTTP pool and, if needed,
+    one browser session across many urls; outside of one, every call opens (and
+    closes) its own.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = None,
+        static_first: bool = True,
+        timeout: float = 20.0,
+        min_chars: int = 500,
+    ):
+        self.cache = PageCacheRepository(cache_dir) if cache_dir else None
+        self.static_first = static_first
+        self.timeout = timeout
+        self.min_chars = min_chars
+        self.http = None
+        self.crawler = None
+        self.crawler_lock = asyncio.Lock()
+        self.stats = {"cache_hits": 0, "static": 0, "browser": 0}
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            follow_redirects=True,
+            timeout=self.timeout,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+
+    async def __aenter__(self):
+        self.http = self._client()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        http, self.http = self.http, None
+        crawler, self.crawler = self.crawler, None
+        await http.aclose()
+        if crawler is not None:
+            await crawler.__aexit__(*exc_info)
+
+    async def url_to_markdown(self, url: str) -> str:
+        if self.static_first:
+            markdown = await self.fetch_static(url)
+            if markdown:
+                return markdown
+            print(f"Static fetch not usable, rendering in browser: {url}")
+        return await self.fetch_rendered(url)
+
+    async def fetch_static(self, url: str) -> str:
+        """Markdown of a static page, "" when the page needs a browser"""
+        if self.http is None:
+            async with self._client() as http:
+                return await self._fetch_static(http, url)
+        return await self._fetch_static(self.http, url)
+
+    async def _fetch_static(self, http: httpx.AsyncClient, url: str) -> str:
+        headers = self.cache.validators(url) if self.cache else {}
+        try:
+            response = await http.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            print(f"Static fetch failed for {url}: {e}")
+            return ""
+
+        if response.status_code == 304 and self.cache:
+            entry = self.cache.get(url)
+            if entry and entry.get("markdown"):
+                self.stats["cache_hits"] += 1
+                return entry["markdown"]
+            response = await http.get(url)
+
+        content_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or "html" not in content_type:
+            print(f"Static fetch got {response.status_code} {content_type} for {url}")
+            return ""
+        html = response.text
+        if RENDER_HINTS.search(html):
+            return ""
+        markdown = html_to_markdown(html)
+        if len(markdown) < self.min_chars:
+            return ""
+
+        self.stats["static"] += 1
+        if self.cache:
+            self.cache.set(
+                url,
+                markdown,
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+            )
+        return markdown
+
+    async def fetch_rendered(self, url: str) -> str:
+        """Markdown of the page rendered by the crawl4ai headless browser"""
+        from crawl4ai import AsyncWebCrawler
+
+        self.stats["browser"] += 1
+        if self.http is None:
+            async with AsyncWebCrawler() as crawler:
+                return await self._crawl(crawler, url)
+        async with self.crawler_lock:
+            if self.crawler is None:
+                crawler = AsyncWebCrawler()
+                await crawler.__aenter__()
+                self.crawler = crawler
+        return await self._crawl(self.crawler, url)
+
     @staticmethod
-    async def url_to_markdown(url: str) -> str:
+    async def _crawl(crawler, url: str) -> str:
+        from crawl4ai import CrawlerRunConfig
+        from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+
         config = CrawlerRunConfig(markdown_generator=DefaultMarkdownGenerator())
-        async with AsyncWebCrawler() as crawler:
-            result = await crawler.arun(url, config=config)
-
-            if result.success:
-                print("Successfully obtain markdown")
-                return result.markdown
-            else:
-                print("Crawl failed:", result.error_message)
-                return ""
+        result = await crawler.arun(url, config=config)
+
+        if result.success:
+            print("Successfully obtain markdown")
+            return result.markdown
+        else:
+            print("Crawl failed:", result.error_message)
+            return ""
@@ -1,17 +1,200 @@
+import csv
+import hashlib
+import io
+import os
+import re
+from typing import Iterator, List
 import pandas as pd
 
+DATASET_PATH = os.path.join(os.path.dirname(__file__), "..", "dataset", "dataset.xlsx")
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", ".cache", "datasets")
+
 
 class ExcelService:
     def __init__(self):
-        self.df = self.open_csv()
+        self._df = None
+
+    @property
+    def df(self):
+        """The bundled dataset, read on first access"""
+        if self._df is None:
+            self._df = self.open_csv()
+        return self._df
 
     def open_csv(self):
         try:
-            return pd.read_excel("dataset/dataset.xlsx")
+            return pd.read_excel(DATASET_PATH)
         except Exception as e:
             print(f"Error fetching dataset:{e}")
 
+    def row_to_text(self, row_contents: list) -> str:
+        input_text = ".".join(
+            str(value) for value in row_contents if value and not pd.isna(value)
+        )
+        return input_text.strip()
+
     def get_content(self):
         row_contents = self.df.iloc[1, :2].tolist()
-        input_text = ".".join(filter(None, row_contents))
-        return input_text.strip()
+        return self.row_to_text(row_contents)
+
+    def get_contents(self, df: pd.DataFrame = None) -> list:
+        """Feature texts for every row of the dataset (name + description)"""
+        df = self.df if df is None else df
+        if df is None:
+            return []
+        texts = [self.row_to_text(row) for row in df.iloc[:, :2].values.tolist()]
+        return [text for text in texts if text]
+
+    def iter_contents(
+        self, path: str = None, chunk_size: int = 500
+    ) -> Iterator[List[str]]:
+        """Stream feature texts in chunks from an .xlsx, .csv or .parquet dataset.
+
+        Rows are read one by one so memory stays flat however large the file is.
+        An .xlsx is converted to a cached copy (parquet when pyarrow is installed,
+        csv otherwise) on the first full pass, later runs read that copy instead.
+        """
+        path = path or DATASET_PATH
+        chunk = []
+        for row in self._iter_rows(path):
+            text = self.normalize_text(self.row_to_text(row))
+            if text:
+                chunk.append(text)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def normalize_text(self, text: str) -> str:
+        return re.sub(r"\s+", " ", text).strip()
+
+    def _iter_rows(self, path: str) -> Iterator[tuple]:
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".csv":
+            return self._iter_csv(path)
+        if extension == ".parquet":
+            return self._iter_parquet(path)
+        cached = self._cache_path(path)
+        if os.path.exists(cached):
+            return self._iter_rows(cached)
+        return self._iter_xlsx(path, cached)
+
+    def _cache_path(self, path: str) -> str:
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        name = os.path.splitext(os.path.basename(path))[0]
+        extension = ".parquet" if _has_pyarrow() else ".csv"
+        return os.path.join(CACHE_DIR, f"{name}-{digest}{extension}")
+
+    def _iter_xlsx(self, path: str, cache_path: str) -> Iterator[tuple]:
+        from openpyxl import load_workbook
+
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        writer = _CacheWriter(tmp_path)
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        completed = False
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            writer.write_header([str(h) for h in header[:2]])
+            for row in rows:
+                row = tuple(row[:2])
+                writer.write(row)
+                yield row
+            completed = True
+        finally:
+            workbook.close()
+            writer.close()
+            if completed:
+                os.replace(tmp_path, cache_path)
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _iter_csv(self, path: str) -> Iterator[tuple]:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                yield tuple(row[:2])
+
+    def _iter_parquet(self, path: str) -> Iterator[tuple]:
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        columns = parquet_file.schema_arrow.names[:2]
+        for batch in parquet_file.iter_batches(batch_size=1024, columns=columns):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+
+    def read_upload(self, content: bytes, filename: str) -> pd.DataFrame:
+        """Parse an uploaded .xlsx/.csv dataset"""
+        if filename.lower().endswith(".csv"):
+            return pd.read_csv(io.BytesIO(content))
+        return pd.read_excel(io.BytesIO(content))
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _CacheWriter:
+    """Appends rows to the converted dataset copy while the xlsx is streamed"""
+
+    def __init__(self, path: str, batch_size: int = 1024):
+        self.path = path
+        self.batch_size = batch_size
+        self.parquet = path.endswith(".parquet.tmp")
+        self.header = None
+        self.rows = []
+        self.writer = None
+        self.file = None
+
+    def write_header(self, header: list):
+        self.header = header
+        if not self.parquet:
+            self.file = open(self.path, "w", newline="", encoding="utf-8")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(header)
+
+    def write(self, row: tuple):
+        if not self.parquet:
+            self.writer.writerow(["" if v is None else v for v in row])
+            return
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = list(zip(*self.rows)) if self.rows else [[] for _ in self.header]
+        table = pa.table(
+            {
+                name: pa.array(
+                    [None if v is None else str(v) for v in values], pa.string()
+                )
+                for name, values in zip(self.header, columns)
+            }
+        )
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        if self.parquet:
+            if self.header is not None and (self.rows or self.writer is None):
+                self._flush()
+            if self.writer is not None:
+                self.writer.close()
+        elif self.file is not None:
+            self.file.close()
@@ -0,0 +1,92 @@
+import asyncio
+from typing import Callable, Dict, Any
+
+from backend.repository.job_repo import JobRepository
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobQueue:
+    """Runs pipeline jobs in the background on a fixed pool of workers.
+
+    `submit` only records the job and queues it, so callers get an id back at
+    once and poll the repository for the outcome. Jobs left unfinished by a
+    previous process are queued again on `start`.
+    """
+
+    def __init__(
+        self,
+        pipeline_factory: Callable,
+        repository: JobRepository,
+        workers: int = 2,
+        max_queued: int = 1000,
+    ):
+        self.pipeline_factory = pipeline_factory
+        self.repository = repository
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.queue = None
+        self.tasks = []
+
+    async def start(self):
+        if self.tasks:
+            return
+        self.queue = asyncio.Queue()
+        for job in self.repository.unfinished():
+            self.queue.put_nowait((job["id"], job["text"], job["llm_summary"]))
+        self.tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def submit(self, text: str, llm_summary: bool = None) -> str:
+        await self.start()
+        if self.queue.qsize() >= self.max_queued:
+            raise QueueFullError(f"{self.max_queued} jobs already queued")
+        job_id = await asyncio.to_thread(self.repository.create, text, llm_summary)
+        self.queue.put_nowait((job_id, text, llm_summary))
+        return job_id
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        return self.repository.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued_in_memory": self.queue.qsize() if self.queue else 0,
+            "jobs": self.repository.counts(),
+        }
+
+    async def worker(self):
+        while True:
+            job_id, text, llm_summary = await self.queue.get()
+            try:
+                await self.run(job_id, text, llm_summary)
+            finally:
+                self.queue.task_done()
+
+    async def run(self, job_id: str, text: str, llm_summary: bool = None):
+        # the repository writes to SQLite, so its calls run in a thread
+        await asyncio.to_thread(self.repository.mark_running, job_id)
+        try:
+            record = await self.pipeline_factory().analyze(text, llm_summary)
+            await asyncio.to_thread(
+                self.repository.mark_done,
+                job_id,
+                {
+                    "result_id": record["id"],
+                    "data": record["data"].model_dump(),
+                    "summary": record["summary"],
+                    "rows": record["rows"],
+                    "reused_from": record.get("reused_from"),
+                    "similarity": record.get("similarity"),
+                },
+            )
+        except Exception as e:
+            print(f"Error running job {job_id}: {e}")
+            await asyncio.to_thread(self.repository.mark_failed, job_id, str(e))
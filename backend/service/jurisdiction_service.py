@@ -0,0 +1,144 @@
+import json
+import os
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+from backend.schema.schemas import IntakeOutput
+
+STATE_CODE_RE = re.compile(r"^[A-Z]{2}-[A-Z0-9]{1,3}$")
+MAPPING_PATH = os.path.join(os.path.dirname(__file__), "..", "util", "mapping.json")
+
+
+def load_mapping(path: str = MAPPING_PATH) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def canonical_jurisdiction(code: str, mapping: Dict) -> str:
+    """The gazetteer's code for a jurisdiction: a bare state code like "FL"
+    becomes "US-FL", the code the resolver gives for Florida"""
+    states = mapping.get("states", {})
+    if code not in states and f"US-{code}" in states:
+        return f"US-{code}"
+    return code
+
+
+class JurisdictionResolver:
+    """Gazetteer lookup of country/continent/state named in a feature text.
+
+    Names (e.g. "Utah", "European Union") match case-insensitively, codes
+    (e.g. "US", "EU", "US-CA") only in upper case so words like "us" are not
+    picked up. Every country is also known by its bare ISO code; a code that
+    is also a US state's postal code ("CA", "ID", "IN", "DE") stands for both,
+    which makes it ambiguous. Internal glossary abbreviations (mapping
+    `terminology`, e.g. "FR" for feature rollout) are never read as codes.
+    `resolve` gives no output when nothing ("empty") or more than one
+    candidate per level ("ambiguous") is found, the caller then falls back
+    to the LLM.
+    """
+
+    def __init__(self, mapping: Dict, jurisdictions: Iterable[str] = ()):
+        self.names = {}
+        self.codes = {}
+        # bare codes shared by a country and a US state, e.g. "CA" -> "US-CA"
+        self.state_clashes = {}
+
+        continent_codes = set(mapping.get("continent", {}).values())
+        for name, code in mapping.get("continent", {}).items():
+            self.names[name.lower()] = ("continent", code)
+        for code, alias in mapping.get("continent_aliases", {}).items():
+            continent_codes.add(code)
+            for name in alias.get("names", []):
+                self.names[name.lower()] = ("continent", code)
+            for alias_code in alias.get("codes", []):
+                self.codes[alias_code] = ("continent", code)
+
+        for code, country in mapping.get("countries", {}).items():
+            for name in country.get("names", []):
+                self.names[name.lower()] = ("country", code)
+            for alias_code in country.get("codes", []):
+                self.codes[alias_code] = ("country", code)
+        self.country_continent = {
+            code: country.get("continent")
+            for code, country in mapping.get("countries", {}).items()
+        }
+
+        for code, names in mapping.get("states", {}).items():
+            self.codes[code] = ("states", code)
+            for name in names:
+                self.names[name.lower()] = ("states", code)
+
+        for code in mapping.get("countries", {}):
+            self.codes.setdefault(code, ("country", code))
+            state = f"US-{code}"
+            if state in mapping.get("states", {}):
+                self.state_clashes[code] = state
+
+        # jurisdictions the rulebook covers are always recognised by their code
+        for code in jurisdictions:
+            if code in self.codes:
+                continue
+            if STATE_CODE_RE.match(code):
+                self.codes[code] = ("states", code)
+            elif code in continent_codes:
+                self.codes[code] = ("continent", code)
+            elif code in self.country_continent:
+                self.codes[code] = ("country", code)
+            else:
+                print(
+                    f"Warning: rulebook jurisdiction {code!r} is not in the "
+                    "gazetteer, it will never be resolved or retrieved"
+                )
+
+        glossary = {term.upper() for term in mapping.get("terminology", {})}
+        for code in [c for c in self.codes if c.upper() in glossary]:
+            del self.codes[code]
+            self.state_clashes.pop(code, None)
+
+        # names may be hyphenated ("Canada-first"), codes may not ("US" in "US-CA")
+        self.name_pattern = self._compile(self.names, r"\b", r"\b", re.IGNORECASE)
+        self.code_pattern = self._compile(self.codes, r"(?<![\w-])", r"(?![\w-])", 0)
+
+    @staticmethod
+    def _compile(terms: Dict, start: str, end: str, flags: int) -> Optional[re.Pattern]:
+        if not terms:
+            return None
+        alternation = "|".join(
+            re.escape(t) for t in sorted(terms, key=len, reverse=True)
+        )
+        return re.compile(start + "(?:" + alternation + ")" + end, flags)
+
+    def find(self, text: str) -> Dict[str, set]:
+        found = {"country": set(), "continent": set(), "states": set()}
+        if self.name_pattern:
+            for match in self.name_pattern.finditer(text):
+                level, code = self.names[match.group(0).lower()]
+                found[level].add(code)
+        if self.code_pattern:
+            for match in self.code_pattern.finditer(text):
+                level, code = self.codes[match.group(0)]
+                found[level].add(code)
+                if match.group(0) in self.state_clashes:
+                    found["states"].add(self.state_clashes[match.group(0)])
+
+        # a state implies its country, a country implies its continent
+        for state in found["states"]:
+            found["country"].add(state.split("-")[0])
+        for country in found["country"]:
+            if self.country_continent.get(country):
+                found["continent"].add(self.country_continent[country])
+        return found
+
+    def resolve(self, text: str) -> Tuple[Optional[IntakeOutput], str]:
+        """Returns (output, outcome) with outcome one of resolved/empty/ambiguous"""
+        found = self.find(text)
+        if not any(found.values()):
+            return None, "empty"
+        if any(len(values) > 1 for values in found.values()):
+            return None, "ambiguous"
+        output = IntakeOutput(
+            country=next(iter(found["country"]), None),
+            continent=next(iter(found["continent"]), None),
+            states=next(iter(found["states"]), None),
+        )
+        return output, "resolved"
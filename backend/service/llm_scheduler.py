@@ -0,0 +1,157 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+from backend.util.metrics import metrics
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+RETRYABLE_NAMES = {
+    "ResourceExhausted",
+    "TooManyRequests",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "DeadlineExceeded",
+    "GatewayTimeout",
+    "TimeoutError",
+    "ConnectionError",
+    "RemoteProtocolError",
+    "ReadTimeout",
+    "ConnectTimeout",
+}
+RETRYABLE_MARKERS = ("429", "resource_exhausted", "quota", "unavailable", "503")
+
+
+class LLMUnavailableError(Exception):
+    """The model stayed unavailable (quota, overload, timeouts) after every retry.
+
+    `cause` is the last upstream error; `status_code` is 429 when it was a
+    quota/rate limit and 503 otherwise.
+    """
+
+    def __init__(self, cause: Exception, attempts: int):
+        self.cause = cause
+        self.attempts = attempts
+        message = str(cause).lower()
+        quota = (
+            "429" in message or "quota" in message or "resource_exhausted" in message
+        )
+        quota = quota or type(cause).__name__ in {
+            "ResourceExhausted",
+            "TooManyRequests",
+        }
+        self.status_code = 429 if quota else 503
+        super().__init__(
+            f"LLM unavailable after {attempts} attempts: {type(cause).__name__}: {cause}"
+        )
+
+
+def is_retryable(error: Exception) -> bool:
+    """Quota, overload, timeout and connection errors are worth another try"""
+    for cls in type(error).__mro__:
+        if cls.__name__ in RETRYABLE_NAMES:
+            return True
+    for attr in ("code", "status_code"):
+        code = getattr(error, attr, None)
+        code = code() if callable(code) else code
+        if isinstance(code, int) and code in RETRYABLE_STATUS:
+            return True
+    message = str(error).lower()
+    return any(marker in message for marker in RETRYABLE_MARKERS)
+
+
+class LLMScheduler:
+    """Every Gemini call of every agent goes through here.
+
+    - a token bucket keeps the request rate under the quota (`rate_per_minute`,
+      with bursts of up to `burst` calls),
+    - retryable errors are retried with full-jitter exponential backoff,
+    - concurrent async calls with the same key share one upstream call.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float = 60,
+        burst: int = 5,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+    ):
+        self.rate = rate_per_minute / 60 if rate_per_minute > 0 else None
+        self.burst = max(1, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.inflight = {}
+
+    def reserve(self) -> float:
+        """Take a token, returns how long to wait before it may be used"""
+        if self.rate is None:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            metrics.llm_throttle_seconds.observe(wait)
+        return wait
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Run a blocking model call under the rate limit, retrying transient errors"""
+        attempt = 0
+        while True:
+            time.sleep(self.reserve())
+            try:
+                return fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if attempt >= self.max_retries:
+                    raise LLMUnavailableError(e, attempt + 1) from e
+                metrics.llm_retries.inc()
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Awaitable version of call"""
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.reserve())
+            try:
+                return await fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if attempt >= self.max_retries:
+                    raise LLMUnavailableError(e, attempt + 1) from e
+                metrics.llm_retries.inc()
+                await asyncio.sleep(self.backoff(attempt))
+                attempt += 1
+
+    async def submit(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """acall, shared with any in-flight call of the same key"""
+        key = (id(asyncio.get_running_loop()), key)
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.acall(fn))
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            metrics.llm_coalesced.inc()
+        # shielded so a cancelled caller does not cancel the others' call
+        return await asyncio.shield(task)
+
+    async def throttle(self):
+        """Wait for a rate-limit token, for streamed calls that cannot be retried"""
+        await asyncio.sleep(self.reserve())
@@ -0,0 +1,183 @@
+import asyncio
+import time
+from typing import List, Dict, Any, AsyncIterator
+from backend.schema.schemas import AnalzyerOutput
+from backend.util.metrics import metrics
+
+
+class PipelineService:
+    """Runs the intake -> analyzer -> summary pipeline for one or many features"""
+
+    def __init__(
+        self,
+        intake_agent,
+        analyzer_agent,
+        summary_agent,
+        result_store,
+        concurrency=5,
+        llm_summary=False,
+        similarity_index=None,
+        history=None,
+    ):
+        self.intake_agent = intake_agent
+        self.analyzer_agent = analyzer_agent
+        self.summary_agent = summary_agent
+        self.result_store = result_store
+        self.concurrency = concurrency
+        self.llm_summary = llm_summary
+        self.similarity_index = similarity_index
+        self.history = history
+
+    async def analyze(self, text: str, llm_summary: bool = None) -> Dict[str, Any]:
+        """Run the pipeline and keep the result in the store, returns its record"""
+        with metrics.stage("normalize"):
+            cleaned_text = self.intake_agent.normalization(text)
+        with metrics.stage("intake"):
+            region = await self.intake_agent.extract_region(cleaned_text)
+            if region is None:
+                raise ValueError("Failed to extract region")
+
+        with metrics.stage("analyzer"):
+            result, meta = self.find_reusable(cleaned_text, region)
+            if result is None:
+                result = await self.analyzer_agent.analyze_question(
+                    cleaned_text, region
+                )
+            if not isinstance(result, AnalzyerOutput):
+                raise ValueError(f"Failed to analyze feature: {result}")
+
+        record = await self._store(text, result, llm_summary, meta)
+        self.remember(record, cleaned_text, region)
+        return record
+
+    def find_reusable(self, cleaned_text: str, region: dict) -> tuple:
+        """Analysis of a near-identical earlier feature in the same jurisdiction,
+        returns (result or None, record metadata)"""
+        if self.similarity_index is None:
+            return None, {}
+        match = self.similarity_index.lookup(cleaned_text, region)
+        if match is None:
+            return None, {}
+        job_id, score, result = match
+        metrics.analysis_reused.inc()
+        return result.model_copy(), {"reused_from": job_id, "similarity": score}
+
+    def remember(self, record: Dict[str, Any], cleaned_text: str, region: dict):
+        """Index a fresh analysis so later near-duplicates can reuse it"""
+        if self.similarity_index is not None and not record.get("reused_from"):
+            self.similarity_index.add(
+                record["id"], cleaned_text, region, record["data"]
+            )
+
+    async def _store(
+        self,
+        text: str,
+        result: AnalzyerOutput,
+        llm_summary: bool = None,
+        meta: Dict[str, Any] = None,
+    ) -> Dict[str, Any]:
+        """Summarise an analysis and keep it in the store, returns its record"""
+        if llm_summary is None:
+            llm_summary = self.llm_summary
+        with metrics.stage("summary"):
+            summary = await self.summary_agent.summarize(result, use_llm=llm_summary)
+            _, rows = self.summary_agent.build_rows(summary, result)
+        with metrics.stage("store"):
+            job_id = self.result_store.create(
+                text, result, summary, rows, **(meta or {})
+            )
+            record = self.result_store.get(job_id)
+            if self.history is not None:
+                # SQLite insert + commit, kept off the event loop
+                await asyncio.to_thread(
+                    self.history.append, job_id, rows, record["created_at"]
+                )
+            return record
+
+    async def stream(
+        self, text: str, llm_summary: bool = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Same pipeline as analyze, yielding an event after every stage and
+        the analyzer tokens as they arrive"""
+        try:
+            with metrics.stage("normalize"):
+                cleaned_text = self.intake_agent.normalization(text)
+            yield {"event": "normalized", "data": {"text": cleaned_text}}
+
+            with metrics.stage("intake"):
+                region = await self.intake_agent.extract_region(cleaned_text)
+                if region is None:
+                    raise ValueError("Failed to extract region")
+            yield {"event": "jurisdiction", "data": region}
+
+            start = time.perf_counter()
+            result, meta = self.find_reusable(cleaned_text, region)
+            if result is None:
+                parts = []
+                async for chunk in self.analyzer_agent.astream_question(
+                    cleaned_text, region
+                ):
+                    parts.append(chunk)
+                    yield {"event": "token", "data": {"text": chunk}}
+                try:
+                    result = self.analyzer_agent.parse_output("".join(parts))
+                except Exception as e:
+                    print(f"Streamed analysis not parseable, retrying structured: {e}")
+                    result = await self.analyzer_agent.analyze_question(
+                        cleaned_text, region
+                    )
+            if not isinstance(result, AnalzyerOutput):
+                metrics.stage_errors.inc(stage="analyzer")
+                raise ValueError(f"Failed to analyze feature: {result}")
+            # timed by hand, the stage spans several yields
+            metrics.observe_stage("analyzer", time.perf_counter() - start)
+            yield {"event": "analysis", "data": {**result.model_dump(), **meta}}
+
+            record = await self._store(text, result, llm_summary, meta)
+            self.remember(record, cleaned_text, region)
+            yield {
+                "event": "summary",
+                "data": {"id": record["id"], "rows": record["rows"]},
+            }
+        except Exception as e:
+            yield {"event": "error", "data": {"error": str(e)}}
+
+    async def analyze_batch(
+        self, texts: List[str], concurrency: int = None
+    ) -> List[Dict[str, Any]]:
+        """Analyze every text with at most `concurrency` pipelines in flight"""
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def worker(index: int, text: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    record = await self.analyze(text)
+                    return {
+                        "index": index,
+                        "id": record["id"],
+                        "text": text,
+                        "status": "success",
+                        "data": record["data"].model_dump(),
+                        "summary": record["summary"],
+                        "rows": record["rows"],
+                        "reused_from": record.get("reused_from"),
+                        "similarity": record.get("similarity"),
+                    }
+                except Exception as e:
+                    print(f"Error analyzing batch item {index}: {e}")
+                    return {
+                        "index": index,
+                        "text": text,
+                        "status": "error",
+                        "error": str(e),
+                    }
+
+        return await asyncio.gather(
+            *(worker(index, text) for index, text in enumerate(texts))
+        )
+
+    def combined_csv(self, results: List[Dict[str, Any]]) -> str:
+        rows = []
+        for result in results:
+            rows.extend(result.get("rows", []))
+        return self.summary_agent.get_csv_text(rows)
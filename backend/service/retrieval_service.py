@@ -0,0 +1,133 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "their", "this", "to",
+    "was", "were", "will", "with", "which", "who", "may", "shall", "any", "not",
+}  # fmt: skip
+INDEXED_SECTIONS = [
+    "definitions",
+    "obligations",
+    "prohibitions",
+    "disclosures_reporting",
+]
+SKIPPED_FIELDS = {"anchor", "evidence"}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token estimate (~4 characters per token)"""
+    return math.ceil(len(text) / 4)
+
+
+def _flatten(value: Any, skip=SKIPPED_FIELDS) -> List[str]:
+    if isinstance(value, dict):
+        return [s for k, v in value.items() if k not in skip for s in _flatten(v)]
+    if isinstance(value, list):
+        return [s for v in value for s in _flatten(v)]
+    return [str(value)] if value not in (None, "") else []
+
+
+class RulebookIndex:
+    """BM25 index over the definitions/obligations/... entries of the rulebook.
+
+    Used by AnalyzerAgent to send only the entries relevant to a feature instead
+    of whole jurisdiction subtrees. Runs fully locally.
+    """
+
+    def __init__(self, geo: Dict[str, Any], k1: float = 1.5, b: float = 0.75):
+        self.geo = geo or {}
+        self.k1 = k1
+        self.b = b
+        self.entries = []
+        for region, book in self.geo.items():
+            for section in INDEXED_SECTIONS + ["enforcement"]:
+                items = book.get(section) or []
+                if isinstance(items, dict):
+                    items = [items]
+                for order, item in enumerate(items):
+                    terms = Counter(tokenize(" ".join(_flatten(item))))
+                    self.entries.append(
+                        {
+                            "region": region,
+                            "section": section,
+                            "order": order,
+                            "item": item,
+                            "terms": terms,
+                            "length": sum(terms.values()),
+                            "size": len(str(item)),
+                        }
+                    )
+
+        self.avg_length = (
+            sum(e["length"] for e in self.entries) / len(self.entries)
+            if self.entries
+            else 0
+        )
+        doc_freq = Counter()
+        for entry in self.entries:
+            doc_freq.update(entry["terms"].keys())
+        n = len(self.entries)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    def score(self, query_terms: List[str], entry: dict) -> float:
+        score = 0.0
+        norm = self.k1 * (
+            1 - self.b + self.b * entry["length"] / (self.avg_length or 1)
+        )
+        for term in query_terms:
+            tf = entry["terms"].get(term)
+            if tf:
+                score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+        return score
+
+    def search(
+        self, query: str, regions: List[str], top_k: int = 6, token_budget: int = 1500
+    ) -> Dict[str, Any]:
+        """Top-k matching entries of the given regions that fit in token_budget.
+
+        Returns the same per-region shape as the rulebook, with each region's
+        `source` kept so the model can still cite the law.
+        """
+        regions = [r for r in regions if r in self.geo]
+        query_terms = list(set(tokenize(query)))
+        scored = [
+            (self.score(query_terms, e), e)
+            for e in self.entries
+            if e["region"] in regions
+        ]
+        # entries sharing no term with the query are not relevant, whatever k is
+        ranked = [
+            e
+            for score, e in sorted(scored, key=lambda pair: pair[0], reverse=True)
+            if score > 0
+        ]
+
+        result = {}
+        for region in regions:
+            result[region] = {"source": self.geo[region].get("source")}
+        budget = token_budget * 4 - len(str(result))
+        selected = []
+        for entry in ranked:
+            if len(selected) >= top_k:
+                break
+            if entry["size"] > budget:
+                continue
+            selected.append(entry)
+            budget -= entry["size"]
+
+        # keep rulebook order inside each section for a stable prompt
+        for entry in sorted(selected, key=lambda e: (e["section"], e["order"])):
+            section = result[entry["region"]].setdefault(entry["section"], [])
+            section.append(entry["item"])
+        return result
@@ -0,0 +1,135 @@
+import hashlib
+import random
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text: str, size: int = 3) -> Set[int]:
+    """Hashed word `size`-grams of the lower-cased text"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        words = words + [""] * (size - len(words))
+    return {
+        int.from_bytes(
+            hashlib.blake2b(
+                " ".join(words[i : i + size]).encode("utf-8"), digest_size=4
+            ).digest(),
+            "big",
+        )
+        for i in range(len(words) - size + 1)
+    }
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """(bands, rows) whose LSH threshold (1/b)^(1/r) sits just under `threshold`"""
+    target = threshold * 0.9
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        distance = abs((1 / bands) ** (1 / rows) - target)
+        if best is None or distance < best[0]:
+            best = (distance, bands, rows)
+    return best[1], best[2]
+
+
+class SimilarityIndex:
+    """MinHash LSH index of analysed feature texts, per jurisdiction.
+
+    `lookup` returns the most similar earlier feature whose shingle Jaccard
+    similarity is at least `threshold` and which resolved to the same
+    jurisdiction; LSH only narrows down the candidates, the score is exact.
+    The oldest entries are dropped once there are more than `max_entries`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        shingle_size: int = 3,
+        max_entries: int = 5000,
+        seed: int = 1,
+    ):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self.entries = OrderedDict()
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def signature(self, features: Set[int]) -> Tuple[int, ...]:
+        if not features:
+            return tuple([MAX_HASH] * self.num_perm)
+        return tuple(
+            min(((a * x + b) % MERSENNE_PRIME) & MAX_HASH for x in features)
+            for a, b in self.permutations
+        )
+
+    def _band_keys(self, scope: Tuple, signature: Tuple[int, ...]) -> list:
+        return [
+            (scope, band, signature[band * self.rows : (band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def scope(region: Optional[Dict[str, Any]]) -> Tuple:
+        region = region or {}
+        return (region.get("country"), region.get("continent"), region.get("states"))
+
+    def lookup(
+        self, text: str, region: Dict[str, Any]
+    ) -> Optional[Tuple[str, float, Any]]:
+        """(key, similarity, payload) of the best earlier match, or None"""
+        features = shingles(text, self.shingle_size)
+        scope = self.scope(region)
+        band_keys = self._band_keys(scope, self.signature(features))
+        with self.lock:
+            candidates = set()
+            for band_key in band_keys:
+                candidates.update(self.buckets.get(band_key, ()))
+            best = None
+            for key in candidates:
+                entry = self.entries[key]
+                score = jaccard(features, entry["features"])
+                if score >= self.threshold and (best is None or score > best[1]):
+                    best = (key, score, entry["payload"])
+        return best
+
+    def add(self, key: str, text: str, region: Dict[str, Any], payload: Any):
+        features = shingles(text, self.shingle_size)
+        band_keys = self._band_keys(self.scope(region), self.signature(features))
+        with self.lock:
+            self.entries[key] = {
+                "features": features,
+                "band_keys": band_keys,
+                "payload": payload,
+            }
+            for band_key in band_keys:
+                self.buckets.setdefault(band_key, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                old_key, old = self.entries.popitem(last=False)
+                for band_key in old["band_keys"]:
+                    bucket = self.buckets.get(band_key)
+                    if bucket is not None:
+                        bucket.discard(old_key)
+                        if not bucket:
+                            del self.buckets[band_key]
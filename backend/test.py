@@ -1,17 +1,17 @@
-from main import ExcelMain, IntakeAgentMain
-from agents.analyzer_agent import AnalyzerAgent
+from backend.util.dependencies import getAnalyzerAgent, getExcelService, getIntakeAgent
 import asyncio
 import json
 
 
 async def main():
-    analyzer = AnalyzerAgent()  # Create instance here instead of importing from main
+    analyzer = getAnalyzerAgent()
+    intake = getIntakeAgent()
 
-    texts = ExcelMain.get_content()
+    texts = getExcelService().get_content()
     print(texts)
-    cleaned_text = IntakeAgentMain.normalization(texts)  # string
+    cleaned_text = intake.normalization(texts)  # string
 
-    region = IntakeAgentMain.extract_region(cleaned_text)  # JSON output
+    region = await intake.extract_region(cleaned_text)  # JSON output
 
     print("\nAnalyzing...")
     result = await analyzer.analyze_question(cleaned_text, region)
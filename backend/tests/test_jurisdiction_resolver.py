@@ -0,0 +1,83 @@
+"""Gazetteer resolution of every dataset row, as the intake agent runs it.
+
+Run from the repository root: python -m unittest backend.tests.test_jurisdiction_resolver
+"""
+
+import json
+import os
+import unittest
+
+import pandas as pd
+
+from backend.repository.rulebook_repo import RulebookRepository
+from backend.service.jurisdiction_service import JurisdictionResolver
+from backend.util.terminology import TerminologyNormalizer
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..")
+DATASET_PATH = os.path.join(BACKEND_DIR, "dataset", "dataset.xlsx")
+MAPPING_PATH = os.path.join(BACKEND_DIR, "util", "mapping.json")
+
+NA = "NA"
+# row -> (outcome, country, continent, states); rows not listed come out "empty"
+EXPECTED = {
+    0: ("resolved", "US", NA, "US-UT"),
+    1: ("resolved", "US", NA, "US-CA"),
+    2: ("resolved", "US", NA, None),
+    3: ("resolved", None, "EU", None),
+    4: ("resolved", "US", NA, "US-FL"),
+    15: ("resolved", None, "EU", None),
+    16: ("ambiguous", None, None, None),
+    17: ("ambiguous", None, None, None),
+    18: ("resolved", "US", NA, None),
+    19: ("resolved", "KR", "APAC", None),
+}
+
+
+class JurisdictionResolverTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(MAPPING_PATH, "r", encoding="utf-8") as f:
+            mapping = json.load(f)
+        cls.normalizer = TerminologyNormalizer(mapping["terminology"])
+        cls.resolver = JurisdictionResolver(mapping, RulebookRepository().regions())
+
+    def resolve(self, text: str):
+        output, outcome = self.resolver.resolve(self.normalizer.normalize(text))
+        if output is None:
+            return (outcome, None, None, None)
+        return (outcome, output.country, output.continent, output.states)
+
+    def test_every_dataset_row(self):
+        df = pd.read_excel(DATASET_PATH)
+        rows = df.iloc[:, :2].values.tolist()
+        for index, row in enumerate(rows):
+            text = ".".join(map(str, row))
+            with self.subTest(row=index, text=text[:60]):
+                expected = EXPECTED.get(index, ("empty", None, None, None))
+                self.assertEqual(self.resolve(text), expected)
+
+    def test_rulebook_regions_are_recognised(self):
+        for region in RulebookRepository().regions():
+            with self.subTest(region=region):
+                self.assertIn(region, self.resolver.codes)
+
+    def test_resolved_states_reach_the_rulebook(self):
+        _, country, continent, state = self.resolve("Parental notices in Florida")
+        books = RulebookRepository().load_regions([country, continent, state])
+        self.assertIn("US-FL", books)
+
+    def test_glossary_terms_are_not_country_codes(self):
+        # "FR" is "Feature rollout status", not France
+        self.assertEqual(
+            self.resolve("Feature gated behind FR for all users")[0], "empty"
+        )
+        self.assertEqual(self.resolve("Rollout in France")[1], "FR")
+
+    def test_several_country_codes_are_ambiguous(self):
+        self.assertEqual(self.resolve("Enable for users in US and BR")[0], "ambiguous")
+        # CA is Canada or California
+        self.assertEqual(self.resolve("Launch in CA")[0], "ambiguous")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""CrawlerService's static fetch path and page cache against a local HTTP server.
+
+Run from the repository root: python -m unittest backend.tests.test_page_cache
+"""
+
+import hashlib
+import http.server
+import tempfile
+import threading
+import unittest
+from email.utils import formatdate
+
+from backend.service.crawler_service import CrawlerService
+
+PAGE = (
+    "<html><head><script>track()</script></head><body>"
+    "<nav>Main menu</nav><main><h1>Social Media Act</h1>"
+    + "<p>A platform shall verify the age of an account holder.</p>" * 20
+    + "</main><footer>Footer</footer></body></html>"
+).encode("utf-8")
+ETAG = '"' + hashlib.sha256(PAGE).hexdigest()[:16] + '"'
+LAST_MODIFIED = formatdate(0, usegmt=True)
+
+
+class StatuteHandler(http.server.BaseHTTPRequestHandler):
+    """Serves PAGE with validators and answers matching conditionals with 304"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        if self.path == "/app":
+            body = b'<html><body><div id="root"></div></body></html>'
+            self._send(200, body)
+        elif self.headers.get("If-None-Match") == ETAG or (
+            self.headers.get("If-Modified-Since") == LAST_MODIFIED
+        ):
+            self.server.statuses.append(304)
+            self.send_response(304)
+            self.end_headers()
+        else:
+            self.server.statuses.append(200)
+            self._send(200, PAGE)
+
+    def _send(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class PageCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StatuteHandler)
+        self.server.requests = []
+        self.server.statuses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/statute"
+        self.cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache_dir.cleanup()
+
+    async def test_second_fetch_is_a_304_served_from_cache(self):
+        async with CrawlerService(cache_dir=self.cache_dir.name) as crawler:
+            first = await crawler.url_to_markdown(self.url)
+            second = await crawler.url_to_markdown(self.url)
+
+        self.assertEqual(self.server.statuses, [200, 304])
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith("# Social Media Act"))
+        self.assertNotIn("Main menu", first)
+        self.assertNotIn("track()", first)
+        self.assertEqual(crawler.stats, {"cache_hits": 1, "static": 1, "browser": 0})
+
+        _, headers = self.server.requests[1]
+        self.assertEqual(headers.get("If-None-Match"), ETAG)
+        self.assertEqual(headers.get("If-Modified-Since"), LAST_MODIFIED)
+
+    async def test_cache_outlives_the_service(self):
+        await CrawlerService(cache_dir=self.cache_dir.name).url_to_markdown(self.url)
+        crawler = CrawlerService(cache_dir=self.cache_dir.name)
+        markdown = await crawler.fetch_static(self.url)
+
+        self.assertEqual(self.server.statuses, [200, 304])
+        self.assertTrue(markdown)
+        self.assertEqual(crawler.stats["cache_hits"], 1)
+
+    async def test_without_cache_dir_every_fetch_downloads(self):
+        crawler = CrawlerService()
+        await crawler.fetch_static(self.url)
+        await crawler.fetch_static(self.url)
+
+        self.assertEqual(self.server.statuses, [200, 200])
+        self.assertNotIn("If-None-Match", self.server.requests[1][1])
+
+    async def test_javascript_shell_needs_the_browser(self):
+        crawler = CrawlerService(cache_dir=self.cache_dir.name)
+        url = self.url.replace("/statute", "/app")
+        self.assertEqual(await crawler.fetch_static(url), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
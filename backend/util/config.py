@@ -8,6 +8,53 @@ load_dotenv()
 
 class Config:
     GEMINI_API_KEY: SecretStr = SecretStr(os.getenv("GEMINI_API_KEY", ""))
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "5"))
+    CRAWL_CONCURRENCY: int = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+    CRAWL_STATIC_FIRST: bool = os.getenv("CRAWL_STATIC_FIRST", "true").lower() == "true"
+    CRAWL_TIMEOUT: float = float(os.getenv("CRAWL_TIMEOUT", "20"))
+    CRAWL_MIN_CHARS: int = int(os.getenv("CRAWL_MIN_CHARS", "500"))
+    CRAWL_CACHE_DIR: str = os.getenv(
+        "CRAWL_CACHE_DIR",
+        os.path.join(os.path.dirname(__file__), "..", ".cache", "pages"),
+    )
+    LEGAL_CHUNK_CHARS: int = int(os.getenv("LEGAL_CHUNK_CHARS", "12000"))
+    LEGAL_CHUNK_CONCURRENCY: int = int(os.getenv("LEGAL_CHUNK_CONCURRENCY", "4"))
+    LLM_SUMMARY: bool = os.getenv("LLM_SUMMARY", "false").lower() == "true"
+    RULEBOOK_TOP_K: int = int(os.getenv("RULEBOOK_TOP_K", "6"))
+    RULEBOOK_SHARD_CACHE: int = int(os.getenv("RULEBOOK_SHARD_CACHE", "16"))
+    RULEBOOK_TOKEN_BUDGET: int = int(os.getenv("RULEBOOK_TOKEN_BUDGET", "1500"))
+    PROMPT_CONTEXT_FORMAT: str = os.getenv("PROMPT_CONTEXT_FORMAT", "compact")
+    PROMPT_EVIDENCE: str = os.getenv("PROMPT_EVIDENCE", "none")
+    PROMPT_EVIDENCE_CHARS: int = int(os.getenv("PROMPT_EVIDENCE_CHARS", "160"))
+    RESULT_STORE_MAX: int = int(os.getenv("RESULT_STORE_MAX", "1000"))
+    RESULT_PERSIST_DIR: str = os.getenv("RESULT_PERSIST_DIR", "")
+    HISTORY_PATH: str = os.getenv(
+        "HISTORY_PATH",
+        os.path.join(os.path.dirname(__file__), "..", ".cache", "history.sqlite3"),
+    )
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_QUEUE_MAX: int = int(os.getenv("JOB_QUEUE_MAX", "1000"))
+    JOB_STORE_PATH: str = os.getenv(
+        "JOB_STORE_PATH",
+        os.path.join(os.path.dirname(__file__), "..", ".cache", "jobs.sqlite3"),
+    )
+    SIMILARITY_ENABLED: bool = os.getenv("SIMILARITY_ENABLED", "true").lower() == "true"
+    SIMILARITY_THRESHOLD: float = float(os.getenv("SIMILARITY_THRESHOLD", "0.85"))
+    SIMILARITY_MAX_ENTRIES: int = int(os.getenv("SIMILARITY_MAX_ENTRIES", "5000"))
+    TIMING_HEADERS: bool = os.getenv("TIMING_HEADERS", "false").lower() == "true"
+    LLM_RATE_PER_MINUTE: float = float(os.getenv("LLM_RATE_PER_MINUTE", "60"))
+    LLM_BURST: int = int(os.getenv("LLM_BURST", "5"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    LLM_BACKOFF_BASE: float = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+    LLM_BACKOFF_MAX: float = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv(
+        "LLM_CACHE_PATH",
+        os.path.join(os.path.dirname(__file__), "..", ".cache", "llm_cache.sqlite3"),
+    )
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+    LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 2**20)))
 
     @classmethod
     def validate_config(cls) -> None:
@@ -29,11 +76,12 @@ class Config:
 
     @classmethod
     def get_gemini_api(cls) -> str:
+        """The API key, validated here so only code that builds the model
+        client needs the secrets"""
+        cls.validate_config()
         return cls.GEMINI_API_KEY.get_secret_value()
 
 
 @lru_cache(maxsize=1)
 def getConfig() -> Config:
-    config = Config()
-    config.validate_config()
-    return config
+    return Config()
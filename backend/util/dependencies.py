@@ -0,0 +1,126 @@
+"""Lazily constructed, process-wide services and agents.
+
+Nothing heavy (model client, rulebook, dataset) is built at import time; each
+getter builds its object on first call and returns the same one afterwards.
+"""
+
+from functools import lru_cache
+
+from backend.util.config import getConfig
+
+
+@lru_cache(maxsize=1)
+def getRuleBook():
+    from backend.repository.rulebook_repo import RulebookRepository
+
+    return RulebookRepository(cache_size=getConfig().RULEBOOK_SHARD_CACHE)
+
+
+@lru_cache(maxsize=1)
+def getCrawler():
+    from backend.service.crawler_service import CrawlerService
+
+    config = getConfig()
+    return CrawlerService(
+        cache_dir=config.CRAWL_CACHE_DIR or None,
+        static_first=config.CRAWL_STATIC_FIRST,
+        timeout=config.CRAWL_TIMEOUT,
+        min_chars=config.CRAWL_MIN_CHARS,
+    )
+
+
+@lru_cache(maxsize=1)
+def getExcelService():
+    from backend.service.excel_service import ExcelService
+
+    return ExcelService()
+
+
+@lru_cache(maxsize=1)
+def getLegalAgent():
+    from backend.agents.legal_agent import LegalAgent
+
+    return LegalAgent()
+
+
+@lru_cache(maxsize=1)
+def getAnalyzerAgent():
+    from backend.agents.analyzer_agent import AnalyzerAgent
+
+    return AnalyzerAgent()
+
+
+@lru_cache(maxsize=1)
+def getIntakeAgent():
+    from backend.agents.intake_agent import IntakeAgent
+
+    return IntakeAgent()
+
+
+@lru_cache(maxsize=1)
+def getSummeryCsvAgent():
+    from backend.agents.summery_csv_agent import SummeryCsvAgent
+
+    return SummeryCsvAgent()
+
+
+@lru_cache(maxsize=1)
+def getResultStore():
+    from backend.repository.result_repo import ResultRepository
+
+    config = getConfig()
+    return ResultRepository(
+        max_results=config.RESULT_STORE_MAX,
+        persist_dir=config.RESULT_PERSIST_DIR or None,
+    )
+
+
+@lru_cache(maxsize=1)
+def getHistory():
+    from backend.repository.history_repo import ResultHistoryRepository
+
+    return ResultHistoryRepository(getConfig().HISTORY_PATH)
+
+
+@lru_cache(maxsize=1)
+def getSimilarityIndex():
+    from backend.service.similarity_service import SimilarityIndex
+
+    config = getConfig()
+    if not config.SIMILARITY_ENABLED:
+        return None
+    return SimilarityIndex(
+        threshold=config.SIMILARITY_THRESHOLD,
+        max_entries=config.SIMILARITY_MAX_ENTRIES,
+    )
+
+
+@lru_cache(maxsize=1)
+def getPipeline():
+    from backend.service.pipeline_service import PipelineService
+
+    config = getConfig()
+    return PipelineService(
+        getIntakeAgent(),
+        getAnalyzerAgent(),
+        getSummeryCsvAgent(),
+        getResultStore(),
+        concurrency=config.BATCH_CONCURRENCY,
+        llm_summary=config.LLM_SUMMARY,
+        similarity_index=getSimilarityIndex(),
+        history=getHistory(),
+    )
+
+
+@lru_cache(maxsize=1)
+def getJobQueue():
+    from backend.repository.job_repo import JobRepository
+    from backend.service.job_service import JobQueue
+
+    config = getConfig()
+    return JobQueue(
+        getPipeline,
+        JobRepository(config.JOB_STORE_PATH),
+        workers=config.JOB_WORKERS,
+        max_queued=config.JOB_QUEUE_MAX,
+    )
@@ -0,0 +1,186 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+# Stage timings of the current request, read by the timing-header middleware
+request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = {
+                    "buckets": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][i] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self.lock:
+            for key, entry in sorted(self.values.items()):
+                for bound, count in zip(self.buckets, entry["buckets"]):
+                    labels = _labels(names, key + (f"{bound:g}",))
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _labels(names, key + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {entry['count']}")
+                labels = _labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {entry['sum']}")
+                lines.append(f"{self.name}_count{labels} {entry['count']}")
+        return lines
+
+
+class Metrics:
+    """Process-wide pipeline and LLM metrics, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.stage_seconds = Histogram(
+            "pipeline_stage_seconds", "Duration of a pipeline stage", ("stage",)
+        )
+        self.stage_errors = Counter(
+            "pipeline_stage_errors_total", "Pipeline stages that raised", ("stage",)
+        )
+        self.analysis_reused = Counter(
+            "analysis_reused_total", "Analyses reused from a near-duplicate feature"
+        )
+        self.rulebook_context_tokens = Histogram(
+            "rulebook_context_tokens",
+            "Estimated tokens of rulebook context in an analyzer prompt",
+            ("format",),
+            SIZE_BUCKETS,
+        )
+        self.rulebook_context_saved_tokens = Counter(
+            "rulebook_context_saved_tokens_total",
+            "Estimated tokens the compact rendering removed from retrieved context",
+        )
+        self.llm_seconds = Histogram(
+            "llm_call_seconds", "Duration of a model call", ("agent", "mode")
+        )
+        self.llm_prompt_chars = Histogram(
+            "llm_prompt_chars",
+            "Characters sent in a model prompt",
+            ("agent",),
+            SIZE_BUCKETS,
+        )
+        self.llm_prompt_tokens = Counter(
+            "llm_prompt_tokens_total", "Prompt tokens reported by the model", ("agent",)
+        )
+        self.llm_completion_tokens = Counter(
+            "llm_completion_tokens_total",
+            "Completion tokens reported by the model",
+            ("agent",),
+        )
+        self.llm_errors = Counter(
+            "llm_errors_total", "Model calls that failed", ("agent",)
+        )
+        self.llm_retries = Counter(
+            "llm_retries_total", "Model calls retried after a transient error"
+        )
+        self.llm_coalesced = Counter(
+            "llm_coalesced_total", "Model calls served by an identical in-flight call"
+        )
+        self.llm_throttle_seconds = Histogram(
+            "llm_throttle_seconds", "Time a model call waited for the rate limit"
+        )
+        self.llm_cache = Counter(
+            "llm_cache_lookups_total", "Response cache lookups", ("agent", "result")
+        )
+
+    def all(self) -> list:
+        return [value for value in vars(self).values() if hasattr(value, "render")]
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.all():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def record_usage(self, agent: str, usage: Optional[dict]):
+        """Token counts from a langchain usage_metadata dict, if the model sent one"""
+        if not usage:
+            return
+        self.llm_prompt_tokens.inc(usage.get("input_tokens", 0), agent=agent)
+        self.llm_completion_tokens.inc(usage.get("output_tokens", 0), agent=agent)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage, also noted in the current request's timings"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.stage_errors.inc(stage=name)
+            raise
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
+
+    def observe_stage(self, name: str, seconds: float):
+        self.stage_seconds.observe(seconds, stage=name)
+        timings = request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + seconds
+
+
+metrics = Metrics()
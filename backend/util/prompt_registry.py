@@ -0,0 +1,52 @@
+import hashlib
+import os
+import threading
+
+import yaml
+
+
+class PromptRegistry:
+    """Parses prompt/template YAML files once and shares the result.
+
+    Every lookup does a cheap `os.stat`; the file is only re-read when its mtime
+    or size changes, and only re-parsed when the content hash changes too, so
+    prompts can be edited on a running server.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def load(self, path: str) -> dict:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry["signature"] == signature:
+                return entry["data"]
+
+            with open(path, "rb") as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
+            if entry is not None and entry["digest"] == digest:
+                entry["signature"] = signature
+                return entry["data"]
+
+            data = yaml.safe_load(raw.decode("utf-8"))
+            self.entries[path] = {
+                "signature": signature,
+                "digest": digest,
+                "data": data,
+            }
+            return data
+
+    def get_prompt(self, path: str, name: str, default: str = None) -> str:
+        prompts = self.load(path)["prompts"]
+        if default is not None:
+            return prompts.get(name, prompts.get(default))
+        return prompts.get(name)
+
+
+prompt_registry = PromptRegistry()
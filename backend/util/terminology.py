@@ -0,0 +1,32 @@
+import re
+from typing import Dict
+
+
+class TerminologyNormalizer:
+    """Expands internal abbreviations in a single pass over the text.
+
+    All terms are compiled into one alternation, longest first, so the regex
+    engine prefers the longest term at each position while keeping the
+    word-boundary and case-insensitive matching of the per-term loop it replaces.
+    """
+
+    def __init__(self, terminology: Dict[str, str]):
+        self.terminology = terminology or {}
+        self.sorted_terms = sorted(self.terminology.keys(), key=len, reverse=True)
+        self.lookup = {}
+        for term in self.sorted_terms:
+            self.lookup.setdefault(term.lower(), term)
+
+        self.pattern = None
+        if self.sorted_terms:
+            alternation = "|".join(re.escape(term) for term in self.sorted_terms)
+            self.pattern = re.compile(r"\b(?:" + alternation + r")\b", re.IGNORECASE)
+
+    def _replace(self, match: re.Match) -> str:
+        term = self.lookup[match.group(0).lower()]
+        return f"{term} ({self.terminology[term]})"
+
+    def normalize(self, input_text: str) -> str:
+        if self.pattern is None:
+            return input_text
+        return self.pattern.sub(self._replace, input_text)
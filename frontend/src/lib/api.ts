@@ -2,6 +2,7 @@ const BASE_URL = 'http://127.0.0.1:8000';
 
 export interface AnalysisResult {
   status: string;
+  id: string;
   data: {
     geolocation: string;
     law: string;
@@ -54,9 +55,9 @@ async analyze(featureText: string): Promise<AnalysisResult> {
     }
   },
 
-  async getResult(): Promise<ComplianceResult[]> {
+  async getResult(id: string): Promise<ComplianceResult[]> {
     try {
-      const response = await fetch(`${BASE_URL}/result`, {
+      const response = await fetch(`${BASE_URL}/result/${encodeURIComponent(id)}`, {
         method: 'GET',
         headers: {
           'Content-Type': 'application/json',
@@ -74,9 +75,9 @@ async analyze(featureText: string): Promise<AnalysisResult> {
     }
   },
 
-  async getSummaryCSV(): Promise<Blob> {
+  async getSummaryCSV(id: string): Promise<Blob> {
     try {
-      const response = await fetch(`${BASE_URL}/summary`, {
+      const response = await fetch(`${BASE_URL}/summary/${encodeURIComponent(id)}`, {
         method: 'GET',
         headers: {
           'Accept': 'text/csv',
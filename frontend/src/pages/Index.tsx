@@ -28,12 +28,6 @@ const Index = () => {
     setIsAnalyzing(true);
     setError(null);
     setAnalysisResult(null); // Clear previous results before new analysis
-    // Clear summery.csv before running analysis
-    try {
-      await fetch('http://127.0.0.1:8000/clear-summary', { method: 'POST' });
-    } catch (e) {
-      // Optionally handle error, but continue with analysis
-    }
     try {
       // Always fetch fresh data, avoid cache
       const result = await api.analyze(prompt);
@@ -63,8 +57,10 @@ const Index = () => {
   };
 
   const handleDownloadJSON = async () => {
+    if (!analysisResult) return;
     try {
-      const data = await api.getResult();
+      // by id, so a concurrent analysis can't be downloaded instead of this one
+      const data = await api.getResult(analysisResult.id);
       const blob = new Blob([JSON.stringify(data, null, 2)], { type: 'application/json' });
       const url = URL.createObjectURL(blob);
       const a = document.createElement('a');
@@ -90,8 +86,9 @@ const Index = () => {
   };
 
   const handleDownloadCSV = async () => {
+    if (!analysisResult) return;
     try {
-      const blob = await api.getSummaryCSV();
+      const blob = await api.getSummaryCSV(analysisResult.id);
       const url = URL.createObjectURL(blob);
       const a = document.createElement('a');
       a.href = url;